@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark the IP Fabric collections fetch and itemize against the local
+MockIPFabric stand-in, reporting for each collection: wall time, number of
+API requests, response bytes, peak traced memory, and items per second.
+
+The IPFabricSource is created from the nauti configuration, as done by
+examples/ex_get.py, so that the interface expanders and field maps of the
+configuration are used; the IP Fabric URL and token are not used since all
+requests are served by the mock.
+
+Examples
+--------
+    # 2,000 devices x 48 interfaces = 96k interfaces and ipaddrs
+    python benchmarks/bench_collections.py --devices 2000
+
+    # 1M interface rows, streamed in pages of 5k with 20ms API latency
+    python benchmarks/bench_collections.py --devices 20000 --interfaces 50 \\
+        --mode stream --page-size 5000 --latency 0.02 -c interfaces
+
+    # the full inventory sync, all of the collections fetched concurrently
+    python benchmarks/bench_collections.py --devices 2000 --latency 0.02 --sync
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+from nauti.source import get_source
+from nauti.config import load_default_config_file
+from nauti.collection import get_collection
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from nauti_ipfabric.orchestrator import fetch_collections
+from mock_ipf import MockIPFabric
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+COLLECTIONS = ["devices", "sites", "interfaces", "ipaddrs", "portchans"]
+
+MODES = ["fetch", "stream", "partitioned"]
+
+
+def _not_none(item):
+    return item is not None
+
+
+def create_source(mock: MockIPFabric, args):
+    return get_source(
+        "ipfabric",
+        base_url="http://mock-ipfabric",
+        token="mock-token",
+        transport=mock.transport(),
+        PAGE_SIZE=args.page_size,
+        FETCH_CONCURRENCY=args.concurrency,
+        ITEMIZE_PROCESSES=args.processes,
+    )
+
+
+async def bench_collection(name: str, mock: MockIPFabric, args) -> Dict:
+    """ run the benchmark for one collection using a new source instance """
+
+    source = create_source(mock, args)
+    await source.login()
+    mock.reset_counters()
+
+    if args.memory:
+        tracemalloc.start()
+
+    col = get_collection(source=source, name=name)
+    start = time.perf_counter()
+
+    if args.mode == "stream":
+        await col.fetch_inventory()
+    else:
+        if args.mode == "partitioned":
+            await col.fetch_partitioned()
+        else:
+            await col.fetch()
+
+        await col.make_keys_parallel(with_filter=_not_none)
+
+    elapsed = time.perf_counter() - start
+
+    peak = 0
+    if args.memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    await source.logout()
+
+    return dict(
+        collection=name,
+        items=len(col.items),
+        seconds=elapsed,
+        requests=mock.requests,
+        bytes=mock.bytes_sent,
+        peak_mb=peak / (1 << 20),
+        rate=len(col.items) / elapsed if elapsed else 0,
+    )
+
+
+async def bench_sync(mock: MockIPFabric, args) -> Dict:
+    """ run the benchmark for all of the collections fetched by the orchestrator """
+
+    source = create_source(mock, args)
+    await source.login()
+    mock.reset_counters()
+
+    if args.memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    collections = await fetch_collections(
+        source, args.collections, stream=args.mode == "stream"
+    )
+    elapsed = time.perf_counter() - start
+
+    peak = 0
+    if args.memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    await source.logout()
+
+    items = sum(len(col.items) for col in collections.values())
+
+    return dict(
+        collection="(sync)",
+        items=items,
+        seconds=elapsed,
+        requests=mock.requests,
+        bytes=mock.bytes_sent,
+        peak_mb=peak / (1 << 20),
+        rate=items / elapsed if elapsed else 0,
+    )
+
+
+def report(results):
+    header = (
+        f"{'collection':<12}{'items':>10}{'seconds':>10}{'requests':>10}"
+        f"{'MB recv':>10}{'peak MB':>10}{'items/s':>12}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for res in results:
+        print(
+            f"{res['collection']:<12}{res['items']:>10}{res['seconds']:>10.3f}"
+            f"{res['requests']:>10}{res['bytes'] / (1 << 20):>10.2f}"
+            f"{res['peak_mb']:>10.1f}{res['rate']:>12,.0f}"
+        )
+
+
+async def main(args):
+    mock = MockIPFabric(
+        devices=args.devices,
+        interfaces=args.interfaces,
+        portchans=args.portchans,
+        sites=args.sites,
+        latency=args.latency,
+    )
+
+    if args.sync:
+        results = [await bench_sync(mock, args)]
+    else:
+        results = [
+            await bench_collection(name, mock, args) for name in args.collections
+        ]
+
+    report(results)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="IP Fabric collections benchmark")
+    parser.add_argument("--devices", type=int, default=1_000)
+    parser.add_argument("--interfaces", type=int, default=48, help="per device")
+    parser.add_argument("--portchans", type=int, default=2, help="per device")
+    parser.add_argument("--sites", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--page-size", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--mode", choices=MODES, default="fetch")
+    parser.add_argument(
+        "--processes", type=int, default=0, help="itemize worker processes"
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="fetch all of the collections together, using the orchestrator",
+    )
+    parser.add_argument(
+        "--no-memory",
+        dest="memory",
+        action="store_false",
+        help="do not trace memory, which slows the benchmark",
+    )
+    parser.add_argument(
+        "-c",
+        "--collections",
+        nargs="+",
+        choices=COLLECTIONS,
+        default=COLLECTIONS,
+    )
+
+    args = parser.parse_args()
+    load_default_config_file()
+    asyncio.run(main(args))
+
+
+if __name__ == "__main__":
+    cli()
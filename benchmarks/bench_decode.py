@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark the decoding of IP Fabric table responses by each of the JSON
+decoders installed, see nauti_ipfabric.decode, using the interface and
+managed IP address tables of the MockIPFabric as realistic payloads.  For
+each table the response size is reported, uncompressed and gzip compressed,
+and for each decoder the best decode time and the speedup over the standard
+library json module.
+
+Examples
+--------
+    # 100k rows per table
+    python benchmarks/bench_decode.py --devices 2000 --interfaces 50
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import argparse
+import gc
+import gzip
+import json
+import time
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from nauti_ipfabric.decode import available_decoders, load_decoder
+from mock_ipf import MockIPFabric
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+TABLES = {
+    "interfaces": "/tables/inventory/interfaces",
+    "ipaddrs": "/tables/addressing/managed-devs",
+}
+
+
+def best_time(func, arg, repeat: int) -> float:
+    """
+    Return the fastest of `repeat` calls of func(arg), in seconds.  As with
+    timeit, the garbage collector is disabled while timing, and the result is
+    released outside of the timing.
+    """
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func(arg)
+            best = min(best, time.perf_counter() - start)
+            del result
+    finally:
+        gc.enable()
+    return best
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="table response decode benchmark")
+    parser.add_argument("--devices", type=int, default=1_000)
+    parser.add_argument("--interfaces", type=int, default=48, help="per device")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    mock = MockIPFabric(devices=args.devices, interfaces=args.interfaces)
+    decoders = available_decoders()
+
+    for name, url in TABLES.items():
+        data = list(mock.table_rows(url))
+        content = json.dumps({"data": data, "_meta": {"count": len(data)}}).encode()
+        zipped = len(gzip.compress(content, compresslevel=1))
+
+        print(
+            f"{name}: {len(data):,} rows, {len(content) / 1e6:.1f} MB, "
+            f"gzip {zipped / 1e6:.1f} MB ({len(content) / zipped:.1f}x)"
+        )
+
+        times = dict()
+
+        for decoder in decoders:
+            loads = load_decoder(decoder)
+            assert loads(content)["data"] == data
+            times[decoder] = best_time(loads, content, args.repeat)
+
+        for decoder, seconds in times.items():
+            print(
+                f"  {decoder:8s} {seconds * 1_000:8.1f} ms "
+                f"{len(content) / seconds / 1e6:8.1f} MB/s "
+                f"{times['json'] / seconds:6.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    cli()
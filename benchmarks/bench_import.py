@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Measure the time to import the nauti plugin modules of this package, as done
+by the nauti CLI when it enumerates the plugins, and check it against a
+budget.  The nauti modules are imported first, so that only the time of this
+package is measured.  The check also fails if importing the plugin modules
+imported any of the DEFERRED_MODULES, which are to be imported only once a
+source or collection is used.
+
+The script must be run in a new interpreter, so that no module is already
+imported; exits with status 1 when the check fails.
+
+Examples
+--------
+    python benchmarks/bench_import.py --budget 100
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import argparse
+import importlib
+import sys
+import time
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# the modules registered as the nauti.plugins entry points, see setup.py.
+
+PLUGIN_MODULES = ["source", "devices", "sites", "interfaces", "ipaddrs", "portchans"]
+
+NAUTI_MODULES = [
+    "nauti.source",
+    "nauti.collection",
+    "nauti.config_models",
+    "nauti.mappings",
+    "nauti.igather",
+    "nauti.collections.devices",
+    "nauti.collections.sites",
+    "nauti.collections.interfaces",
+    "nauti.collections.ipaddrs",
+    "nauti.collections.portchans",
+]
+
+DEFERRED_MODULES = ["aioipfabric", "httpx", "concurrent.futures.process"]
+
+
+def timed_import(names) -> float:
+    """ return the milliseconds used to import the modules """
+    start = time.perf_counter()
+    for name in names:
+        importlib.import_module(name)
+    return (time.perf_counter() - start) * 1_000
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="plugin import time check")
+    parser.add_argument(
+        "--budget", type=float, default=100.0, help="milliseconds, default 100"
+    )
+    args = parser.parse_args()
+
+    nauti_ms = timed_import(NAUTI_MODULES)
+    plugin_ms = timed_import(f"nauti_ipfabric.{name}" for name in PLUGIN_MODULES)
+    deferred = [name for name in DEFERRED_MODULES if name in sys.modules]
+
+    print(f"nauti modules:  {nauti_ms:8.1f} ms")
+    print(f"plugin modules: {plugin_ms:8.1f} ms (budget {args.budget:.1f} ms)")
+
+    failed = False
+
+    if plugin_ms > args.budget:
+        print("FAIL: plugin import time is over budget")
+        failed = True
+
+    if deferred:
+        print(f"FAIL: modules imported that should be deferred: {deferred}")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,313 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+A local stand-in for the IP Fabric API used to benchmark the collections
+without an IP Fabric system.  The MockIPFabric instance is an httpx
+transport handler serving synthetic tables, generated on demand from the
+record index, so that large tables do not need to be held in memory.
+
+The mock supports the API features used by the collections: columns
+selection, filters (eq, neq, like, and, or), pagination, and gzip response
+compression when accepted by the client; and adds an optional per-request
+latency.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Optional, Iterable, Callable, Set
+from functools import partial
+from itertools import islice
+import asyncio
+import gzip
+import json
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import httpx
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["MockIPFabric"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+_MATCHERS = {
+    "eq": lambda value, arg: value == arg,
+    "neq": lambda value, arg: value != arg,
+    "like": lambda value, arg: str(arg).lower() in str(value).lower(),
+}
+
+
+def _match(rec: Dict, filters: Optional[Dict]) -> bool:
+    """ return True if the record matches the IPF filter dictionary """
+    for column, expr in (filters or {}).items():
+        if column == "and":
+            if not all(_match(rec, each) for each in expr):
+                return False
+        elif column == "or":
+            if not any(_match(rec, each) for each in expr):
+                return False
+        elif not _MATCHERS[expr[0]](rec.get(column), expr[1]):
+            return False
+
+    return True
+
+
+class MockIPFabric(object):
+    """
+    Synthetic IP Fabric system.  The tables are sized by the number of
+    devices; each device has `interfaces` interfaces with a managed IP
+    address on each, and `portchans` port-channels of two members.
+
+    The `requests` and `bytes_sent` attributes count the table requests
+    served and the response body bytes sent, compressed when the client
+    accepts gzip, and can be reset by `reset_counters`.
+    """
+
+    SNAPSHOT_ID = "mock-snapshot"
+
+    def __init__(
+        self,
+        devices: int = 1_000,
+        interfaces: int = 48,
+        portchans: int = 2,
+        sites: int = 50,
+        latency: float = 0.0,
+        compress: bool = True,
+    ):
+        self.n_devices = devices
+        self.n_interfaces = interfaces
+        self.n_portchans = portchans
+        self.n_sites = sites
+        self.latency = latency
+        self.compress = compress
+        self.requests = 0
+        self.bytes_sent = 0
+
+        self._host_ids = {self.hostname(dev_id): dev_id for dev_id in range(devices)}
+        self._site_devices = dict()
+        for dev_id in range(devices):
+            self._site_devices.setdefault(self.site(dev_id), set()).add(dev_id)
+
+        per_device = {
+            "/tables/inventory/devices": (1, self._device),
+            "/tables/inventory/interfaces": (interfaces, self._interface),
+            "/tables/addressing/managed-devs": (interfaces, self._ipaddr),
+            "/tables/interfaces/port-channel/member-status": (
+                portchans,
+                self._portchan,
+            ),
+        }
+
+        self._tables = {
+            url: partial(self._device_rows, count, row_fn)
+            for url, (count, row_fn) in per_device.items()
+        }
+        self._tables["/tables/inventory/sites"] = self._site_rows
+
+    def reset_counters(self):
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def transport(self) -> httpx.MockTransport:
+        """ return the httpx transport to use with the IPFabricSource """
+        return httpx.MockTransport(self)
+
+    # -------------------------------------------------------------------------
+    #
+    #                          Synthetic Records
+    #
+    # -------------------------------------------------------------------------
+
+    def hostname(self, dev_id: int) -> str:
+        return f"sw{dev_id:06d}.bench.example"
+
+    def site(self, dev_id: int) -> str:
+        return f"site{dev_id % self.n_sites:04d}"
+
+    def family(self, dev_id: int) -> str:
+        return "exos" if dev_id % 10 == 0 else "eos"
+
+    def if_name(self, dev_id: int, if_id: int) -> str:
+        return f"1:{if_id + 1}" if self.family(dev_id) == "exos" else f"Et{if_id + 1}"
+
+    def _device(self, dev_id: int, _) -> Dict:
+        return dict(
+            sn=f"SN{dev_id:08d}",
+            snHw=f"HW{dev_id:08d}",
+            hostname=self.hostname(dev_id),
+            siteName=self.site(dev_id),
+            loginIp=f"10.{dev_id >> 16 & 255}.{dev_id >> 8 & 255}.{dev_id & 255}",
+            loginType="ssh",
+            uptime=86400 + dev_id,
+            vendor="arista" if self.family(dev_id) == "eos" else "extreme",
+            platform="bench",
+            family=self.family(dev_id),
+            version="1.0",
+            model="bench-48",
+        )
+
+    def _interface(self, dev_id: int, if_id: int) -> Dict:
+        return dict(
+            hostname=self.hostname(dev_id),
+            intName=self.if_name(dev_id, if_id),
+            dscr=f"link to peer {if_id}" if if_id % 3 else None,
+            siteName=self.site(dev_id),
+            l1="up",
+            primaryIp=f"192.0.2.{if_id % 250 + 1}" if if_id % 4 == 0 else None,
+        )
+
+    def _ipaddr(self, dev_id: int, if_id: int) -> Dict:
+        return dict(
+            sn=f"SN{dev_id:08d}",
+            hostname=self.hostname(dev_id),
+            intName=self.if_name(dev_id, if_id),
+            siteName=self.site(dev_id),
+            mac="0000.5e00.5301",
+            ip=f"10.{dev_id >> 8 & 255}.{dev_id & 255}.{if_id % 250 + 1}",
+            net=f"10.{dev_id >> 8 & 255}.{dev_id & 255}.0/24",
+        )
+
+    def _portchan(self, dev_id: int, pc_id: int) -> Dict:
+        first = pc_id * 2 + 1
+        return dict(
+            sn=f"SN{dev_id:08d}",
+            hostname=self.hostname(dev_id),
+            intName=f"Po{pc_id + 1}",
+            siteName=self.site(dev_id),
+            protocol="lacp",
+            members=f"Et{first}(P), Et{first + 1}(P)",
+        )
+
+    # -------------------------------------------------------------------------
+    #
+    #                          Table Rows
+    #
+    # -------------------------------------------------------------------------
+
+    def _candidate_devices(self, filters: Optional[Dict]) -> Optional[Set[int]]:
+        """
+        Return the device ids that can match the filters using only the
+        hostname and siteName 'eq' expressions, so that filtered requests do
+        not need to generate every row of the table; None means all devices.
+        """
+        if not filters:
+            return None
+
+        found = list()
+
+        for column, expr in filters.items():
+            if column in ("and", "or"):
+                sets = [self._candidate_devices(each) for each in expr]
+                if column == "or":
+                    if any(each is None for each in sets):
+                        return None
+                    found.append(set().union(*sets))
+                elif known := [each for each in sets if each is not None]:
+                    found.append(set.intersection(*known))
+
+            elif expr[0] == "eq" and column == "hostname":
+                dev_id = self._host_ids.get(expr[1])
+                found.append(set() if dev_id is None else {dev_id})
+
+            elif expr[0] == "eq" and column == "siteName":
+                found.append(self._site_devices.get(expr[1], set()))
+
+        return set.intersection(*found) if found else None
+
+    def _device_rows(
+        self, count: int, row_fn: Callable, filters: Optional[Dict]
+    ) -> Iterable[Dict]:
+        dev_ids = self._candidate_devices(filters)
+        dev_ids = range(self.n_devices) if dev_ids is None else sorted(dev_ids)
+
+        for dev_id in dev_ids:
+            for index in range(count):
+                if _match(rec := row_fn(dev_id, index), filters):
+                    yield rec
+
+    def _site_rows(self, filters: Optional[Dict]) -> Iterable[Dict]:
+        per_site = -(-self.n_devices // self.n_sites)
+        for site_id in range(self.n_sites):
+            rec = dict(
+                id=str(site_id),
+                siteName=f"site{site_id:04d}",
+                devicesCount=per_site,
+                networksCount=self.n_interfaces,
+                usersCount=0,
+            )
+            if _match(rec, filters):
+                yield rec
+
+    def table_rows(self, url: str, filters: Optional[Dict] = None) -> Iterable[Dict]:
+        """ return the rows of the table `url`, e.g. "/tables/inventory/devices" """
+        return self._tables[url](filters)
+
+    # -------------------------------------------------------------------------
+    #
+    #                          HTTP Handler
+    #
+    # -------------------------------------------------------------------------
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        path = "/" + request.url.path.split("/api/v1/", 1)[-1].lstrip("/")
+
+        if path == "/os/version":
+            return httpx.Response(200, json={"version": "mock"})
+
+        if path == "/snapshots":
+            return httpx.Response(200, json=[{"id": self.SNAPSHOT_ID, "name": "mock"}])
+
+        if path not in self._tables:
+            return httpx.Response(404, json={"message": f"unknown table: {path}"})
+
+        body = json.loads(request.content)
+        rows = self.table_rows(path, body.get("filters"))
+
+        if pagination := body.get("pagination"):
+            start, limit = pagination["start"], pagination["limit"]
+            rows = islice(rows, start, start + limit)
+
+        data = list(rows)
+
+        if columns := body.get("columns"):
+            data = [{col: rec.get(col) for col in columns} for rec in data]
+
+        content = json.dumps({"data": data, "_meta": {"count": len(data)}}).encode()
+        headers = {"Content-Type": "application/json"}
+
+        if self.compress and "gzip" in request.headers.get("Accept-Encoding", ""):
+            content = gzip.compress(content, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+
+        self.requests += 1
+        self.bytes_sent += len(content)
+
+        return httpx.Response(200, content=content, headers=headers)
@@ -0,0 +1,178 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Checkpoints of a paginated table fetch, so that a fetch interrupted by an
+error, a cancellation, or its time budget can be resumed from the last page
+received rather than from the start of the table.
+
+The checkpoint is a directory holding a file per page of table records, in
+the `dump_records` form, and a "progress.json" file that identifies the
+request (the snapshot id, table, and filter) and the offset of the next page.
+Each page file is written before the progress is updated, so that the
+progress only ever refers to pages that are committed.  IPF snapshots are
+immutable, so the pages of a resumed fetch are consistent with those
+committed before.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Iterator, List, Optional, AnyStr
+from pathlib import Path
+import json
+import os
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from nauti_ipfabric.response_cache import dump_records, load_records, _FORMAT_VERSION
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["FetchCheckpoint"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+def _write_atomic(file_p: Path, data: bytes):
+    """ write the file by renaming a temporary file, so it is never partial """
+    tmp_p = file_p.with_name(f"{file_p.name}.{os.getpid()}.tmp")
+    tmp_p.write_bytes(data)
+    os.replace(tmp_p, file_p)
+
+
+class FetchCheckpoint(object):
+    """
+    The checkpoint directory of one paginated table request.  The `progress`
+    attribute is the content of the progress file:
+
+        snapshot: str
+            The IPF snapshot id.
+
+        table: str
+            The table name, see `IPFabricSource.paginate`.
+
+        filters:
+            The IPF filter of the request, if any.
+
+        request: str
+            The request key, see `IPFabricSource._request_key`, identifying
+            the request excluding the pagination.
+
+        offset: int
+            The table offset of the next page to fetch.
+
+        pages: list
+            The page file names, in table order.
+
+        complete: bool
+            True once the last page has been committed.
+    """
+
+    PROGRESS_FILE = "progress.json"
+    PAGE_SUFFIX = ".ipfc"
+
+    def __init__(self, directory: AnyStr):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.progress: Optional[Dict] = None
+
+    @property
+    def offset(self) -> int:
+        return self.progress["offset"]
+
+    @property
+    def complete(self) -> bool:
+        return self.progress["complete"]
+
+    def begin(self, snapshot: str, table: str, filters, request: str) -> bool:
+        """
+        Load the progress of the request; returns True when resuming the
+        progress of a prior fetch.  When the directory holds the progress of
+        a different request, or none, the directory is cleared and the
+        progress starts from the first page.
+        """
+        progress_p = self.directory / self.PROGRESS_FILE
+
+        try:
+            progress = json.loads(progress_p.read_text())
+        except (FileNotFoundError, ValueError):
+            progress = None
+
+        if (
+            progress
+            and progress["request"] == request
+            and progress["format"] == _FORMAT_VERSION
+        ):
+            self.progress = progress
+            return True
+
+        self.clear()
+        self.progress = dict(
+            snapshot=snapshot,
+            table=table,
+            filters=filters,
+            request=request,
+            format=_FORMAT_VERSION,
+            offset=0,
+            pages=list(),
+            complete=False,
+        )
+        self._write_progress()
+        return False
+
+    def commit(self, records: List[Dict], final: bool = False):
+        """
+        Store the page of `records` fetched at the current offset, and advance
+        the offset; `final` is True for the last page of the table.
+        """
+        progress = self.progress
+
+        if records:
+            name = f"page-{progress['offset']:012d}{self.PAGE_SUFFIX}"
+            _write_atomic(self.directory / name, dump_records(records))
+            progress["pages"].append(name)
+            progress["offset"] += len(records)
+
+        progress["complete"] = final
+        self._write_progress()
+
+    def pages(self) -> Iterator[List[Dict]]:
+        """ return an iterator of the committed pages of records """
+        for name in self.progress["pages"]:
+            yield load_records((self.directory / name).read_bytes())
+
+    def clear(self):
+        """ remove the progress and page files """
+        (self.directory / self.PROGRESS_FILE).unlink(missing_ok=True)
+        for page_p in self.directory.glob("page-*" + self.PAGE_SUFFIX):
+            page_p.unlink()
+
+        self.progress = None
+
+    def _write_progress(self):
+        _write_atomic(
+            self.directory / self.PROGRESS_FILE, json.dumps(self.progress).encode()
+        )
@@ -0,0 +1,312 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Optional, Callable, Dict, AnyStr
+from os import environ, getenv
+import asyncio
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+from httpx import AsyncClient, HTTPStatusError
+from aioipfabric.client import IPFabricClient as _AioIPFabricClient
+from aioipfabric.consts import ENV, API_VER
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["IPFabricClient", "IPFabricSession"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class IPFabricSession(AsyncClient):
+    """
+    The asyncio HTTP session to the IP Fabric API, used in place of the
+    aioipfabric IPFSession so that the login state is available via public
+    methods; see `state` and `restore`, used by the source session cache.
+
+    When logged in with credentials, rather than an API token, a request
+    that receives a 401 response, for example once the access token has
+    expired, is retried once after the access token is refreshed.  Should the
+    refresh token no longer be valid the session logs in again using the
+    credentials.  Concurrent requests share a single refresh.
+    """
+
+    API_THROTTLE = 100
+    API_DEFAULT_TIMEOUT = 30
+    API_HEADER_TOKEN = "X-API-Token"
+
+    URL_LOGIN = "auth/login"
+    URL_TOKEN_REFRESH = "auth/token"
+
+    def __init__(
+        self,
+        base_url: str,
+        token: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        on_refresh: Optional[Callable[[bool], None]] = None,
+        **clientopts,
+    ):
+        """
+        Parameters
+        ----------
+        base_url: str
+            The IPF API base URL.
+
+        token: str
+            The IPF API token; or else the `username` and `password` login
+            credentials are required.
+
+        on_refresh: callable
+            Called after the access token is refreshed on a 401 response;
+            the argument is True when the session logged in again using the
+            credentials, and False when the refresh token was used.
+
+        Other Parameters
+        ----------------
+        The `clientopts` are passed to the httpx.AsyncClient as-is, except for
+        "API_THROTTLE", the maximum number of concurrent requests.
+        """
+        api_throttle = clientopts.pop("API_THROTTLE", None)
+
+        super().__init__(
+            base_url=base_url,
+            timeout=clientopts.pop("timeout", self.API_DEFAULT_TIMEOUT),
+            verify=False,
+            **clientopts,
+        )
+
+        if not (token or all((username, password))):
+            raise RuntimeError("MISSING required token or (username, password)")
+
+        self.api_token = token
+        self.refresh_token: Optional[str] = None
+        self.on_refresh = on_refresh
+
+        self._credentials = dict(username=username, password=password)
+        self._sema4 = asyncio.Semaphore(api_throttle or self.API_THROTTLE)
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+        if token:
+            self.headers[self.API_HEADER_TOKEN] = token
+
+        self.headers["Content-Type"] = "application/json"
+
+    @property
+    def token(self) -> Optional[str]:
+        """ the API token, or the refresh token when using credentials """
+        return self.api_token or self.refresh_token
+
+    # -------------------------------------------------------------------------
+    #
+    #                             Login State
+    #
+    # -------------------------------------------------------------------------
+
+    def state(self) -> Dict:
+        """
+        Return the login state; the access token authorization header and the
+        refresh token, both None when using an API token.
+        """
+        authorization = self.headers.get("Authorization")
+
+        return dict(
+            authorization=authorization,
+            refresh_token=self.refresh_token if authorization else None,
+        )
+
+    def restore(self, state: Dict):
+        """ restore the login state, as returned by `state` """
+        if self.api_token or not state["authorization"]:
+            return
+
+        self.headers["Authorization"] = state["authorization"]
+        self.refresh_token = state["refresh_token"]
+
+    async def authenticate(self):
+        """
+        Obtain an access token, using the refresh token if there is one, else
+        the login credentials; there is nothing to do when using an API token.
+        """
+        if self.api_token:
+            return
+
+        if self.refresh_token:
+            try:
+                await self._refresh_access_token()
+                return
+
+            except HTTPStatusError:
+                pass
+
+        await self._login()
+
+    # -------------------------------------------------------------------------
+    #
+    #                             Override Methods
+    #
+    # -------------------------------------------------------------------------
+
+    async def request(self, method: str, url, **kwargs):
+        async with self._sema4:
+            authorization = self.headers.get("Authorization")
+            res = await super().request(method, url, **kwargs)
+
+            if res.status_code != 401 or self.api_token:
+                return res
+
+            await self._refresh(authorization)
+            return await super().request(method, url, **kwargs)
+
+    # -------------------------------------------------------------------------
+    #
+    #                             Private Methods
+    #
+    # -------------------------------------------------------------------------
+
+    async def _refresh(self, authorization: Optional[str]):
+        """
+        Refresh the access token after a request, made with the
+        `authorization` header value, received a 401 response; unless
+        already refreshed by a concurrent request.
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+
+        async with self._refresh_lock:
+            if self.headers.get("Authorization") != authorization:
+                return
+
+            relogin = self.refresh_token is None
+
+            if not relogin:
+                try:
+                    await self._refresh_access_token()
+
+                except HTTPStatusError:
+                    relogin = True
+
+            if relogin:
+                await self._login()
+
+            if self.on_refresh:
+                self.on_refresh(relogin)
+
+    async def _refresh_access_token(self):
+        res = await super().request(
+            "POST",
+            self.URL_TOKEN_REFRESH,
+            json={"refreshToken": self.refresh_token},
+        )
+        res.raise_for_status()
+        self.headers["Authorization"] = f"Bearer {res.json()['accessToken']}"
+
+    async def _login(self):
+        res = await super().request("POST", self.URL_LOGIN, json=self._credentials)
+        res.raise_for_status()
+        body = res.json()
+        self.refresh_token = body["refreshToken"]
+        self.headers["Authorization"] = f"Bearer {body['accessToken']}"
+
+
+class IPFabricClient(_AioIPFabricClient):
+    """
+    The aioipfabric IPFabricClient using the `IPFabricSession`, and providing
+    the login state, including the IPF version and snapshot catalog, via
+    `session_state` and `restore_session`.  The client initialization mirrors
+    that of aioipfabric 0.11, the range pinned in requirements.txt, so that
+    the aioipfabric session is not created.
+    """
+
+    def __init__(
+        self,
+        *mixin_classes,
+        base_url: Optional[AnyStr] = None,
+        token: Optional[AnyStr] = None,
+        username: Optional[AnyStr] = None,
+        password: Optional[AnyStr] = None,
+        **clientopts,
+    ):
+        """
+        See the aioipfabric IPFBaseClient; the options, including the
+        environment variable defaults, are the same.  The `clientopts` are
+        passed to the IPFabricSession.
+        """
+        self._sessionopts = dict(
+            base_url=(base_url or environ[ENV.addr]) + API_VER,
+            token=token or getenv(ENV.token),
+            username=username or getenv(ENV.username),
+            password=password or getenv(ENV.password),
+            **clientopts,
+        )
+        self.api = IPFabricSession(**self._sessionopts)
+
+        if mixin_classes:
+            self.mixin(*mixin_classes)
+
+        self.snapshots = None
+        self._active_snapshot = None
+        self.version = None
+
+    async def login(self):
+        # a session closed by logout is replaced, retaining the login state.
+
+        if self.api.is_closed:
+            state = self.api.state()
+            self.api = IPFabricSession(**self._sessionopts)
+            self.api.restore(state)
+
+        await super().login()
+
+    def session_state(self) -> Dict:
+        """ return the login state, see `restore_session` """
+        return dict(
+            version=self.version,
+            snapshots=self.snapshots,
+            active_snapshot=self.active_snapshot,
+            **self.api.state(),
+        )
+
+    def restore_session(self, state: Dict):
+        """
+        Restore the login state, as returned by `session_state`, in place of
+        login.  The restored access token is used until the IPF system
+        responds 401, and is then refreshed.
+        """
+        self.version = state["version"]
+        self.snapshots = state["snapshots"]
+        self.api.restore(state)
+
+        # the active_snapshot setter takes the snapshot name, the state holds
+        # the snapshot id.
+
+        self.active_snapshot = next(
+            snap["name"]
+            for snap in self.snapshots
+            if snap["id"] == state["active_snapshot"]
+        )
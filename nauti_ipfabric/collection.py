@@ -0,0 +1,794 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import (
+    Dict,
+    List,
+    Callable,
+    AsyncIterator,
+    Optional,
+    Iterable,
+    Tuple,
+    AnyStr,
+)
+from operator import itemgetter
+from copy import copy
+from time import perf_counter
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from nauti.collection import get_collection
+from nauti.igather import igather
+from nauti_ipfabric.records import CompactRecordList, compact_record
+from nauti_ipfabric.filters import filter_any, filter_all
+from nauti_ipfabric.delta import CollectionDelta, new_baseline, partition_digest
+from nauti_ipfabric.indexes import Index, CollectionIndexes
+from nauti_ipfabric.interning import intern_item
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["IPFabricCollectionMixin"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class IPFabricCollectionMixin(object):
+    """
+    Mixin providing the fetch machinery common to the IP Fabric collections.
+    A collection subclass must implement `_fetcher` to return the IPF client
+    table coroutine that retrieves its records.  The subclass may also
+    override `_prepare_fetch` to process any collection specific fetch
+    parameters, and `_xf_records` to transform the table records into the
+    form consumed by `itemize`.
+
+    The mixin must precede the nauti Collection class in the subclass
+    bases so that its methods take precedence.
+    """
+
+    # The table columns used by `itemize`; only these columns are requested
+    # from the IPF API so that the response contains no unused data.
+
+    COLUMNS = None
+
+    # The table column used to partition the table when the records are
+    # retrieved using `fetch_partitioned`.
+
+    PARTITION_KEY = "siteName"
+
+    # The table column, and IPF filter operator, used by `fetch_items` to
+    # select the records of the item keys; the column value is obtained from
+    # the item key by `_item_filter_value`.  When None, `fetch_items` is not
+    # supported by the collection.
+
+    ITEMS_FILTER = None
+
+    # The item indexes, keyed by index name, maintained as the items are
+    # created so that items can be found by `lookup` on fields other than the
+    # item key.
+
+    INDEXES: Dict[str, Index] = {}
+
+    # The names of the collections that must be fetched before this
+    # collection, when fetched by nauti_ipfabric.orchestrator.
+
+    DEPENDS: Tuple[str, ...] = ()
+
+    def __init__(self, *vargs, **kwargs):
+        super().__init__(*vargs, **kwargs)
+
+        # when compact records are enabled, the source records are stored as
+        # CompactRecord, as are the items when keyed.
+
+        self.compact = self.source.compact_records
+        if self.compact:
+            self.source_records = CompactRecordList()
+
+        self.indexes = CollectionIndexes(self.INDEXES)
+
+    # -------------------------------------------------------------------------
+    #
+    #                     Subclass Methods
+    #
+    # -------------------------------------------------------------------------
+
+    def _fetcher(self) -> Callable:
+        """ return the IPF client table coroutine used to fetch records """
+        raise NotImplementedError()
+
+    async def _prepare_fetch(self, params: Dict) -> None:
+        """ prepare the fetch `params`, updated in place, prior to the fetch """
+
+        # any `columns` requested are in addition to the COLUMNS used by
+        # itemize.
+
+        if (columns := params.get("columns")) is not None:
+            params["columns"] = list(dict.fromkeys([*self.COLUMNS, *columns]))
+
+        if isinstance(filters := params.get("filters"), str):
+            params["filters"] = self.source.compile_filter(filters)
+
+    def _xf_records(self, records: List[Dict]) -> List[Dict]:
+        """ transform the table records into the form used by `itemize` """
+        return records
+
+    def _prepare_itemize(self) -> None:
+        """
+        Prepare any state used by `itemize` derived from the `cache`; called
+        once the cache is set, including by the `make_keys_parallel` workers.
+        """
+        pass
+
+    def _itemize_cache(self) -> Dict:
+        """
+        Return the picklable subset of `cache` used by `itemize`; provided to
+        the worker processes of `make_keys_parallel`.
+        """
+        return dict()
+
+    def _detached(self):
+        """
+        Return a shallow copy of the collection with its own `cache`, used to
+        prepare and itemize a part of a concurrent fetch without changing the
+        cache of the collection.
+        """
+        detached = copy(self)
+        detached.cache = dict(self.cache)
+        return detached
+
+    def _itemize_depends(self, records: List[Dict]) -> Optional[Dict]:
+        """
+        Return the values, other than the records, that the items of the
+        records depend on, for example from the `cache`; included in the
+        partition digest of `fetch_delta`.
+        """
+        return None
+
+    def _item_filter_value(self, key) -> str:
+        """ return the ITEMS_FILTER column value used to fetch the item key """
+        if len(self.KEY_FIELDS) == 1:
+            return key
+
+        return key[self.KEY_FIELDS.index(self.ITEMS_FILTER[0])]
+
+    # -------------------------------------------------------------------------
+    #
+    #                     Collection Methods
+    #
+    # -------------------------------------------------------------------------
+
+    def make_keys(
+        self,
+        *fields,
+        with_filter: Optional[Callable[[Dict], bool]] = None,
+        with_translate: Optional[Callable] = None,
+        with_inventory: Optional[List[Dict]] = None,
+    ):
+        """
+        Create the collection items from the source records, or from the
+        `with_inventory` records; see nauti Collection.make_keys.  Each item
+        is keyed, compacted and indexed as it is created, so that no
+        additional pass over the items is needed.  Records that itemize to
+        None are omitted.
+        """
+        records = with_inventory or self.source_records
+        start = perf_counter()
+
+        if not with_inventory:
+            self.items.clear()
+            self.indexes.clear()
+
+        self._key_items(
+            records, map(self.itemize, records), fields, with_filter, with_translate
+        )
+
+        if self.source.metrics:
+            self._emit_itemize(len(records), len(self.items), start)
+
+    def _key_items(
+        self,
+        records: Iterable[Dict],
+        items: Iterable[Optional[Dict]],
+        fields: Tuple[str, ...],
+        with_filter: Optional[Callable[[Dict], bool]],
+        with_translate: Optional[Callable],
+    ):
+        """ store each of the `items` of the `records`; see `make_keys` """
+        kf_getter = itemgetter(*(fields or self.KEY_FIELDS))
+        record_keys = self.source_record_keys
+
+        # when there is nothing to compact or index, the item is stored as-is.
+
+        set_item = (
+            self._set_item if self.compact or self.indexes else self.items.__setitem__
+        )
+
+        for rec, item in zip(records, items):
+            if item is None or (with_filter and not with_filter(item)):
+                continue
+
+            key = kf_getter(item)
+            if with_translate:
+                key = with_translate(key)
+
+            set_item(key, item)
+            record_keys[key] = rec
+
+    def lookup(self, index: str, *values) -> List[Dict]:
+        """
+        Return the items having the given field `values` in the named index;
+        for a composite index, one value per index field.
+        """
+        value = values[0] if len(values) == 1 else values
+        return [self.items[key] for key in self.indexes.keys(index, value)]
+
+    def _set_item(self, key, item: Dict):
+        """ store the item, compacted if enabled, and update the indexes """
+        if self.compact:
+            item = compact_record(item)
+
+        if self.indexes and (prior := self.items.get(key)) is not None:
+            self.indexes.discard(key, prior)
+
+        self.items[key] = item
+        self.indexes.add(key, item)
+
+    async def make_keys_parallel(
+        self,
+        *fields,
+        with_filter: Optional[Callable[[Dict], bool]] = None,
+        with_translate: Optional[Callable] = None,
+        processes: Optional[int] = None,
+    ):
+        """
+        Alternative to `make_keys` for very large collections; the source
+        records are itemized by a pool of worker processes, rather than on the
+        event loop thread, see nauti_ipfabric.parallel.  The items created
+        are the same as those created by `make_keys`.
+
+        Parameters
+        ----------
+        fields, with_filter, with_translate:
+            See nauti Collection.make_keys.
+
+        processes: int
+            The number of worker processes; defaults to the source
+            itemize_processes value.  When 0, or when the source records fit
+            into a single chunk, `make_keys` is used.
+        """
+        if processes is None:
+            processes = self.source.itemize_processes
+
+        chunk_size = self.source.itemize_chunk_size
+
+        if processes < 1 or len(self.source_records) <= chunk_size:
+            self.make_keys(
+                *fields, with_filter=with_filter, with_translate=with_translate
+            )
+            return
+
+        # the process pool machinery is only imported when used.
+
+        from nauti_ipfabric.parallel import itemize_parallel
+
+        start = perf_counter()
+        items = await itemize_parallel(self, self.source_records, processes, chunk_size)
+
+        self.items.clear()
+        self.indexes.clear()
+        # the unpickled items do not share the interned strings of the itemize
+        # memos, so they are interned as they are stored.
+
+        self._key_items(
+            self.source_records,
+            map(intern_item, items),
+            fields,
+            with_filter,
+            with_translate,
+        )
+
+        if self.source.metrics:
+            self._emit_itemize(len(self.source_records), len(self.items), start)
+
+    def _itemize_records(self, records: List[Dict]) -> List[Dict]:
+        """ return the items of the records, omitting those that are None """
+        if not self.source.metrics:
+            return [item for item in map(self.itemize, records) if item is not None]
+
+        start = perf_counter()
+        items = [item for item in map(self.itemize, records) if item is not None]
+        self._emit_itemize(len(records), len(items), start)
+        return items
+
+    def _emit_itemize(self, records: int, items: int, start: float):
+        self.source.metrics.emit(
+            "itemize",
+            collection=self.name,
+            records=records,
+            items=items,
+            seconds=perf_counter() - start,
+        )
+
+    # -------------------------------------------------------------------------
+    #
+    #                     Fetch Methods
+    #
+    # -------------------------------------------------------------------------
+
+    async def fetch(self, **params):
+        """ retrieve all records from the IPF table into `source_records` """
+        await self._prepare_fetch(params)
+        records = await self.source.fetch_records(self._fetcher(), **params)
+        self.source_records.extend(self._xf_records(records))
+
+    async def fetch_batches(
+        self, batches: List[Dict], concurrency: Optional[int] = None
+    ):
+        """
+        Retrieve the IPF table records for each of the `batches` parameters
+        concurrently, and store them into `source_records` in the order of the
+        `batches`, regardless of the order in which the requests complete.
+
+        Parameters
+        ----------
+        batches:
+            List of fetch parameters, one per API call.  These parameters must
+            already be prepared, that is the 'filters' are the IPF filter
+            dictionaries, and are passed as-is to the table coroutine.
+
+        concurrency: int
+            The maximum number of concurrent API calls; defaults to the source
+            concurrency value.
+        """
+        for records in await self._fetch_batch_records(batches, concurrency):
+            self.source_records.extend(records)
+
+    async def _fetch_batch_records(
+        self, batches: List[Dict], concurrency: Optional[int] = None
+    ) -> List[List[Dict]]:
+        """ return the records of each of the `batches`, in `batches` order """
+        fetcher = self._fetcher()
+        tasks = {
+            self.source.fetch_records(fetcher, **params): index
+            for index, params in enumerate(batches)
+        }
+        results = [None] * len(batches)
+
+        async for coro, records in igather(
+            tasks, limit=concurrency or self.source.concurrency
+        ):
+            results[tasks[coro]] = self._xf_records(records)
+
+        return results
+
+    async def fetch_partitioned(
+        self,
+        partitions: Optional[Iterable[str]] = None,
+        partition_key: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        **params,
+    ):
+        """
+        Retrieve the IPF table records by partitioning the table on the value
+        of a column, by default the site name, and fetching each partition
+        concurrently rather than the complete table in one long request.  The
+        records are stored into `source_records` ordered by partition value,
+        so that the result is the same regardless of request completion order.
+
+        Parameters
+        ----------
+        partitions:
+            The partition column values; if not provided the site names are
+            obtained from the IPF sites collection.
+
+        partition_key:
+            The table column used to partition the records; defaults to the
+            collection PARTITION_KEY.
+
+        concurrency: int
+            The maximum number of concurrent API calls; defaults to the source
+            concurrency value.
+
+        Other Parameters
+        ----------------
+        The same parameters accepted by `fetch`.
+        """
+        partition_key = partition_key or self.PARTITION_KEY
+        values = await self._partition_values(partition_key, partitions)
+        batches = await self._partition_batches(partition_key, values, params)
+        await self.fetch_batches(batches, concurrency=concurrency)
+
+    async def fetch_items(
+        self,
+        items: Dict,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ):
+        """
+        Retrieve the source records of the given item keys, rather than the
+        complete table.  The keys are translated into the ITEMS_FILTER values,
+        for example the hostnames, which are fetched in batches that run
+        concurrently.  Since a filter value may select more records than those
+        of the keys, only the records whose itemized key is one of the item
+        keys are stored into `source_records`.  The items of those records are
+        stored into `items` as they are fetched, so that `make_keys` does not
+        need to be called.
+
+        Each batch is prepared by `_prepare_fetch` with the batch filter; so
+        that a collection using the device cache, for example interfaces,
+        fetches only the devices selected by the same filter.
+
+        Parameters
+        ----------
+        items:
+            The items, keyed by the collection KEY_FIELDS; only the keys are
+            used.
+
+        batch_size: int
+            The number of filter values per API call; defaults to the source
+            batch_size value.
+
+        concurrency: int
+            The maximum number of concurrent API calls; defaults to the source
+            concurrency value.
+        """
+        if self.ITEMS_FILTER is None:
+            raise NotImplementedError()
+
+        if not items:
+            return
+
+        column, oper = self.ITEMS_FILTER
+        batch_size = batch_size or self.source.batch_size
+        values = sorted({self._item_filter_value(key) for key in items})
+        fetcher = self._fetcher()
+
+        async def fetch_batch(batch_values: List[str]) -> List[Tuple[Dict, Dict]]:
+            # each batch is prepared and itemized by its own detached
+            # collection, so that the cache prepared for the batch, e.g. the
+            # batch devices, is not changed by the other batches.
+
+            batch = self._detached()
+            params = dict(filters=filter_any(column, batch_values, oper=oper))
+            await batch._prepare_fetch(params)
+
+            records = batch._xf_records(
+                await self.source.fetch_records(fetcher, **params)
+            )
+
+            return [
+                (rec, item)
+                for rec, item in zip(records, map(batch.itemize, records))
+                if item is not None and kf_getter(item) in items
+            ]
+
+        kf_getter = itemgetter(*self.KEY_FIELDS)
+        batches = {
+            fetch_batch(values[start : start + batch_size]): index
+            for index, start in enumerate(range(0, len(values), batch_size))
+        }
+        results = [None] * len(batches)
+
+        async for coro, found in igather(
+            batches, limit=concurrency or self.source.concurrency
+        ):
+            results[batches[coro]] = found
+
+        for found in results:
+            for rec, item in found:
+                key = kf_getter(item)
+                self.source_records.append(rec)
+                self._set_item(key, item)
+                self.source_record_keys[key] = self.source_records[-1]
+
+    async def fetch_delta(
+        self,
+        baseline: Optional[Dict] = None,
+        partitions: Optional[Iterable[str]] = None,
+        partition_key: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        **params,
+    ) -> CollectionDelta:
+        """
+        Retrieve the collection changes relative to a baseline from a prior
+        call.  When the baseline is from the active snapshot, nothing is
+        fetched.  Otherwise the table is fetched by partition, as done by
+        `fetch_partitioned`, and the content digest of each partition is
+        compared to the baseline; only the partitions that changed are
+        itemized and compared item by item.
+
+        The collection `items` are set to the complete set of current items,
+        keyed by the KEY_FIELDS.
+
+        Parameters
+        ----------
+        baseline:
+            The `CollectionDelta.baseline` value returned by a prior call, or
+            None to treat all items as added.
+
+        partitions, partition_key, concurrency:
+            See `fetch_partitioned`.
+
+        Other Parameters
+        ----------------
+        The same parameters accepted by `fetch`.
+
+        Returns
+        -------
+        CollectionDelta with the added, updated and deleted items, and the
+        baseline to provide to the next call.
+        """
+        snapshot = self.source.client.active_snapshot
+        delta = CollectionDelta(baseline=new_baseline(snapshot))
+        kf_getter = itemgetter(*self.KEY_FIELDS)
+        baseline = baseline or {}
+        prior = baseline.get("partitions", {})
+
+        if baseline.get("snapshot") == delta.baseline["snapshot"]:
+            delta.baseline = baseline
+            for part in prior.values():
+                for item in part["items"]:
+                    self._set_item(kf_getter(item), item)
+            return delta
+
+        partition_key = partition_key or self.PARTITION_KEY
+        delta.baseline["partition_key"] = partition_key
+        values = await self._partition_values(partition_key, partitions)
+        batches = await self._partition_batches(partition_key, values, params)
+        results = await self._fetch_batch_records(batches, concurrency=concurrency)
+
+        for value, records in zip(values, results):
+            digest = partition_digest(records, self._itemize_depends(records))
+            was = prior.get(value, {})
+
+            if was.get("digest") == digest:
+                items = was["items"]
+            else:
+                items = self._itemize_records(records)
+                delta.compare(kf_getter, was.get("items", []), items)
+
+            delta.baseline["partitions"][value] = dict(digest=digest, items=items)
+            for item in items:
+                self._set_item(kf_getter(item), item)
+
+        # any partition that no longer exists has all of its items deleted.
+
+        for value in prior.keys() - set(values):
+            delta.compare(kf_getter, prior[value]["items"], [])
+
+        delta.resolve_moves()
+        return delta
+
+    async def _partition_values(
+        self, partition_key: str, partitions: Optional[Iterable[str]]
+    ) -> List[str]:
+        """ return the sorted partition values, site names by default """
+        if partitions is None:
+            if partition_key != "siteName":
+                raise ValueError(f"partitions required for key: {partition_key}")
+
+            site_col = get_collection(source=self.source, name="sites")
+            await site_col.fetch()
+            partitions = [rec["siteName"] for rec in site_col.source_records]
+
+        return sorted(set(partitions))
+
+    async def _partition_batches(
+        self, partition_key: str, values: List[str], params: Dict
+    ) -> List[Dict]:
+        """ return the fetch parameters for each of the partition values """
+        await self._prepare_fetch(params)
+        base_filters = params.pop("filters", None)
+
+        return [
+            dict(
+                params,
+                filters=filter_all(base_filters, {partition_key: ["eq", value]}),
+            )
+            for value in values
+        ]
+
+    async def fetch_pages(
+        self, page_size: Optional[int] = None, **params
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Async generator that retrieves the IPF table records one page at a
+        time.  The records are not stored into `source_records`.
+
+        Parameters
+        ----------
+        page_size: int
+            The number of records per API call; defaults to the source
+            page_size value.
+
+        Other Parameters
+        ----------------
+        The same parameters accepted by `fetch`.
+
+        Yields
+        ------
+        List of source records, one page at a time.
+        """
+        await self._prepare_fetch(params)
+
+        async for page in self.source.paginate(
+            self._fetcher(), page_size=page_size, **params
+        ):
+            yield self._xf_records(page)
+
+    async def fetch_checkpointed(
+        self,
+        directory: AnyStr,
+        page_size: Optional[int] = None,
+        time_budget: Optional[float] = None,
+        **params,
+    ) -> bool:
+        """
+        Resumable alternative to `fetch`.  The table pages are committed to
+        the checkpoint `directory` as they arrive, and a fetch that did not
+        complete, because of an error, cancellation, or the time budget,
+        resumes from the last committed page when called again with the
+        same parameters.  The records are stored into `source_records` only
+        once all of the pages are committed.
+
+        Parameters
+        ----------
+        directory:
+            The checkpoint directory, used only for this collection fetch.
+
+        page_size: int
+            The number of records per API call; defaults to the source
+            page_size value.
+
+        time_budget: float
+            The number of seconds after which no further page is requested.
+
+        Other Parameters
+        ----------------
+        The same parameters accepted by `fetch`.
+
+        Returns
+        -------
+        True when the fetch is complete; False when the time budget expired
+        before the last page.
+
+        Examples
+        --------
+            while not await col.fetch_checkpointed("ipf-ifs", time_budget=60):
+                ...
+            col.make_keys()
+        """
+        await self._prepare_fetch(params)
+
+        records = await self.source.fetch_checkpointed(
+            self._fetcher(),
+            directory,
+            page_size=page_size,
+            time_budget=time_budget,
+            **params,
+        )
+
+        if records is None:
+            return False
+
+        self.source_records.extend(self._xf_records(records))
+        return True
+
+    async def fetch_stream(
+        self, page_size: Optional[int] = None, **params
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Async generator that retrieves the IPF table records one page at a
+        time and yields the itemized records of each page as it arrives.
+        Records that itemize to None are omitted.
+
+        Yields
+        ------
+        List of items, one page at a time.
+        """
+        async for page in self.fetch_pages(page_size=page_size, **params):
+            yield self._itemize_records(page)
+
+    async def fetch_inventory(
+        self,
+        *fields,
+        page_size: Optional[int] = None,
+        with_filter: Optional[Callable[[Dict], bool]] = None,
+        **params,
+    ):
+        """
+        Streaming alternative to calling `fetch` followed by `make_keys`.  The
+        collection items are keyed as each page is itemized, and the source
+        records are not retained; so that at most one page of source records
+        is held in memory.
+
+        Parameters
+        ----------
+        fields:
+            The item fields used to create the keys; defaults to the collection
+            KEY_FIELDS.
+
+        page_size: int
+            The number of records per API call.
+
+        with_filter:
+            Optional function used to exclude an item when it returns False.
+
+        Other Parameters
+        ----------------
+        The same parameters accepted by `fetch`.
+        """
+        kf_getter = itemgetter(*(fields or self.KEY_FIELDS))
+
+        async for items in self.fetch_stream(page_size=page_size, **params):
+            for item in items:
+                if with_filter and not with_filter(item):
+                    continue
+
+                self._set_item(kf_getter(item), item)
+
+    # -------------------------------------------------------------------------
+    #
+    #                     Export Methods
+    #
+    # -------------------------------------------------------------------------
+
+    async def export_columnar(
+        self,
+        path: str,
+        records_path: Optional[str] = None,
+        page_size: Optional[int] = None,
+        **params,
+    ) -> int:
+        """
+        Fetch the collection, one page at a time, and write the items, and
+        optionally the source records, to an Arrow IPC or Parquet file; see
+        nauti_ipfabric.export.  Requires the pyarrow package.
+
+        Returns
+        -------
+        The number of items exported.
+        """
+        from nauti_ipfabric.export import export_collection
+
+        return await export_collection(
+            self, path, records_path=records_path, page_size=page_size, **params
+        )
+
+    def import_columnar(self, path: str) -> Dict[str, str]:
+        """
+        Load a file written by `export_columnar` into the collection items, or
+        source records, replacing any existing data; see
+        nauti_ipfabric.export.  Requires the pyarrow package.
+
+        Returns
+        -------
+        The file metadata, including the IPF snapshot id of the export.
+        """
+        from nauti_ipfabric.export import import_collection
+
+        return import_collection(self, path)
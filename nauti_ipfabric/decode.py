@@ -0,0 +1,98 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Decoding of the IP Fabric table responses.  The JSON decoder is selected from
+those installed, in the order of DECODERS, the fastest first: msgspec, orjson,
+and the standard library json module, which is always available; see
+benchmarks/bench_decode.py.  The decoder can be selected by the source option
+"JSON_DECODER".
+
+The faster decoders are optional dependencies, installed with the "fast"
+extra: pip install nauti-ipfabric[fast]
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Any, Callable, List, Optional
+from importlib import import_module
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["DECODERS", "load_decoder", "available_decoders"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# each decoder is the name of the module and the name of its function that
+# decodes the JSON response body bytes.
+
+DECODERS = {
+    "msgspec": ("msgspec.json", "decode"),
+    "orjson": ("orjson", "loads"),
+    "json": ("json", "loads"),
+}
+
+Decoder = Callable[[bytes], Any]
+
+
+def _import_decoder(name: str) -> Decoder:
+    mod_name, func_name = DECODERS[name]
+    return getattr(import_module(mod_name), func_name)
+
+
+def available_decoders() -> List[str]:
+    """ return the names of the decoders that are installed, fastest first """
+    found = list()
+
+    for name in DECODERS:
+        try:
+            _import_decoder(name)
+        except ImportError:
+            continue
+        found.append(name)
+
+    return found
+
+
+def load_decoder(name: Optional[str] = None) -> Decoder:
+    """
+    Return the JSON decoder function with the given `name`, or when not
+    provided, the fastest decoder installed.
+    """
+    if name is None:
+        for name in DECODERS:
+            try:
+                return _import_decoder(name)
+            except ImportError:
+                continue
+
+    if name not in DECODERS:
+        raise ValueError(
+            f"Unknown JSON decoder {name}, expected one of {list(DECODERS)}"
+        )
+
+    try:
+        return _import_decoder(name)
+    except ImportError as exc:
+        raise RuntimeError(f"The JSON decoder {name} is not installed") from exc
@@ -0,0 +1,113 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, List, Tuple, Callable, Optional
+from dataclasses import dataclass, field
+import hashlib
+import json
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["CollectionDelta", "new_baseline", "partition_digest"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+def new_baseline(snapshot: str) -> Dict:
+    """
+    Return an empty baseline for the given snapshot id.  The baseline
+    structure is JSON serializable so that it can be stored between runs:
+
+        snapshot: str
+            The IPF snapshot id the baseline was created from.
+
+        partition_key: str
+            The table column used to partition the records.
+
+        partitions: dict
+            key: the partition value, for example the site name.
+            value: dict with the partition 'digest' and list of 'items'.
+    """
+    return dict(snapshot=snapshot, partition_key=None, partitions=dict())
+
+
+def partition_digest(records: List[Dict], depends: Optional[Dict] = None) -> str:
+    """
+    Return the content digest of the partition records.  The digest does not
+    depend on the order of the records so that the same records returned in
+    a different order are not considered a change.  The `depends` values,
+    other data used to itemize the records, for example the os_name of each
+    device, are included so that a change to them is also a change.
+    """
+    digest = hashlib.sha256()
+    for encoded in sorted(json.dumps(rec, sort_keys=True) for rec in records):
+        digest.update(encoded.encode())
+
+    if depends:
+        digest.update(json.dumps(depends, sort_keys=True).encode())
+
+    return digest.hexdigest()
+
+
+@dataclass
+class CollectionDelta:
+    """
+    The changes to a collection relative to a baseline, as returned by the
+    collection `fetch_delta`.  The `added`, `updated`, and `deleted` values
+    are dicts keyed by the item key; `updated` contains the new item values.
+    """
+
+    baseline: Dict
+    added: Dict[Tuple, Dict] = field(default_factory=dict)
+    updated: Dict[Tuple, Dict] = field(default_factory=dict)
+    deleted: Dict[Tuple, Dict] = field(default_factory=dict)
+
+    def compare(self, key_getter: Callable, prior: List[Dict], current: List[Dict]):
+        """ add the changes between the prior and current items of a partition """
+        was = {key_getter(item): item for item in prior}
+
+        for item in current:
+            key = key_getter(item)
+            if (old := was.pop(key, None)) is None:
+                self.added[key] = item
+            elif dict(old) != dict(item):
+                self.updated[key] = item
+
+        self.deleted.update(was)
+
+    def resolve_moves(self):
+        """
+        An item that moved between partitions, for example a device moved to
+        a different site, is found as both deleted and added; these are
+        changed to be an update, or no change when the item is the same.
+        """
+        for key in self.added.keys() & self.deleted.keys():
+            item, old = self.added.pop(key), self.deleted.pop(key)
+            if dict(old) != dict(item):
+                self.updated[key] = item
+
+    def __bool__(self):
+        return bool(self.added or self.updated or self.deleted)
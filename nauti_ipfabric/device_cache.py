@@ -0,0 +1,184 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Tuple, Optional, Union, Hashable
+import asyncio
+import json
+import time
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from nauti.collection import Collection, get_collection
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["DeviceCache"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+def _filter_key(filters: Optional[Union[str, Dict]]) -> Hashable:
+    """ return a hashable form of the filters used to key the cache """
+    if filters is None or isinstance(filters, str):
+        return filters
+
+    return json.dumps(filters, sort_keys=True)
+
+
+class DeviceCache(object):
+    """
+    The DeviceCache is owned by the IPFabricSource so that the collections
+    that need device attributes, for example the `os_name` used by
+    interfaces, share a single fetch of the devices table rather than each
+    collection fetching its own copy.
+
+    Each cache entry is a devices collection whose items are keyed by
+    hostname.  Entries are keyed by the snapshot id and the filter used to
+    fetch the devices.  Once the unfiltered device inventory is cached for a
+    snapshot, it is used to serve any filtered request for that snapshot
+    since it is a superset of the devices.
+
+    The expired entries are removed as entries are added, and the number of
+    entries is bounded by MAX_ENTRIES, removing the oldest first; so that the
+    cache does not grow with each distinct filter used.
+    """
+
+    MAX_ENTRIES = 64
+
+    def __init__(self, source, ttl: Optional[float] = None):
+        """
+        Parameters
+        ----------
+        source: IPFabricSource
+            The source instance owning the cache.
+
+        ttl: float
+            The number of seconds a cache entry remains valid; if None then
+            entries remain valid until invalidated.
+        """
+        self.source = source
+        self.ttl = ttl
+        self._entries: Dict[Tuple, Tuple[float, Collection]] = dict()
+
+        # `_locks` holds the lock of each entry being fetched, so that
+        # concurrent calls for the same entry wait on a single fetch; the
+        # lock is removed once the fetch completes.
+
+        self._locks: Dict[Tuple, asyncio.Lock] = dict()
+
+    def _lookup(self, key: Tuple) -> Optional[Collection]:
+        """ return the cached device collection if present and not expired """
+        if (entry := self._entries.get(key)) is None:
+            return None
+
+        expires, dev_col = entry
+        if expires and expires < time.monotonic():
+            del self._entries[key]
+            return None
+
+        return dev_col
+
+    def _store(self, key: Tuple, dev_col: Collection):
+        """ add the cache entry, removing the expired and the oldest entries """
+        now = time.monotonic()
+
+        for expired in [
+            each for each, (expires, _) in self._entries.items() if 0 < expires < now
+        ]:
+            del self._entries[expired]
+
+        self._entries.pop(key, None)
+        while len(self._entries) >= self.MAX_ENTRIES:
+            del self._entries[next(iter(self._entries))]
+
+        self._entries[key] = (now + self.ttl if self.ttl else 0, dev_col)
+
+    async def get(self, filters: Optional[Union[str, Dict]] = None) -> Collection:
+        """
+        Return the devices collection, keyed by hostname, for the active
+        snapshot and `filters`; fetching the devices only when they are not
+        already cached.  Concurrent calls for the same entry wait on a
+        single fetch.
+
+        Parameters
+        ----------
+        filters:
+            The IPF filter expression (str) or parsed filter (dict) used to
+            select the devices.
+        """
+        snapshot = self.source.client.active_snapshot
+
+        if (dev_col := self._lookup((snapshot, None))) is not None:
+            return dev_col
+
+        key = (snapshot, _filter_key(filters))
+
+        if (lock := self._locks.get(key)) is None:
+            lock = self._locks[key] = asyncio.Lock()
+
+        try:
+            async with lock:
+                if (dev_col := self._lookup(key)) is not None:
+                    return dev_col
+
+                dev_col = get_collection(source=self.source, name="devices")
+                await dev_col.fetch_inventory("hostname", filters=filters)
+                self._store(key, dev_col)
+
+        finally:
+            if self._locks.get(key) is lock and not lock.locked():
+                del self._locks[key]
+
+        return dev_col
+
+    def prime(self, devices: Collection, filters: Optional[Union[str, Dict]] = None):
+        """
+        Add the cache entry, for the active snapshot and `filters`, from the
+        devices collection fetched by the caller using those filters; so that
+        the devices table is not fetched again.  The items of the `devices`
+        collection, which must already be keyed, are keyed by hostname into a
+        new collection rather than itemized again.
+        """
+        dev_col = get_collection(source=self.source, name="devices")
+
+        for item in devices.items.values():
+            dev_col._set_item(item["hostname"], item)
+
+        self._store((self.source.client.active_snapshot, _filter_key(filters)), dev_col)
+
+    def invalidate(self, snapshot: Optional[str] = None):
+        """
+        Remove cache entries for the given `snapshot` id, or all entries when
+        `snapshot` is not provided.
+        """
+        if snapshot is None:
+            self._entries.clear()
+            return
+
+        for key in [key for key in self._entries if key[0] == snapshot]:
+            del self._entries[key]
@@ -17,13 +17,8 @@
 # System Imports
 # -----------------------------------------------------------------------------
 
-from typing import Dict, Optional
-
-# -----------------------------------------------------------------------------
-# Public Imports
-# -----------------------------------------------------------------------------
-
-from aioipfabric.filters import parse_filter
+from typing import Dict, Optional, Callable
+from functools import partial
 
 # -----------------------------------------------------------------------------
 # Private Imports
@@ -32,7 +27,8 @@ from aioipfabric.filters import parse_filter
 from nauti.collection import Collection, CollectionCallback
 from nauti.collections.devices import DeviceCollection
 from nauti_ipfabric.source import IPFabricSource
-from nauti.mappings import normalize_hostname
+from nauti_ipfabric.collection import IPFabricCollectionMixin
+from nauti_ipfabric.indexes import Index
 
 # -----------------------------------------------------------------------------
 # Exports
@@ -48,22 +44,40 @@ __all__ = ["IPFabricDeviceCollection"]
 # -----------------------------------------------------------------------------
 
 
-class IPFabricDeviceCollection(Collection, DeviceCollection):
+class IPFabricDeviceCollection(IPFabricCollectionMixin, Collection, DeviceCollection):
 
     source_class = IPFabricSource
 
-    async def fetch(self, **params):
-        if (filters := params.get("filters")) is not None:
-            params["filters"] = parse_filter(filters)
+    COLUMNS = (
+        "sn",
+        "snHw",
+        "hostname",
+        "loginIp",
+        "siteName",
+        "family",
+        "vendor",
+        "model",
+    )
 
-        self.source_records.extend(await self.source.client.fetch_devices(**params))
+    # devices are found by hostname or login IP address, and listed by site.
+
+    INDEXES = dict(
+        hostname=Index(("hostname",), unique=True),
+        ipaddr=Index(("ipaddr",), unique=True),
+        site=Index(("site",)),
+    )
+
+    def _fetcher(self) -> Callable:
+        return partial(self.source.client.fetch_devices, columns=list(self.COLUMNS))
 
     def itemize(self, rec: Dict) -> Dict:
+        source = self.source
+
         return dict(
             sn=rec.get("snHw") or rec["sn"],
-            hostname=normalize_hostname(rec["hostname"]),
+            hostname=source.hostnames[rec["hostname"]],
             ipaddr=rec["loginIp"],
-            site=self.map_field_value("site", rec["siteName"]),
+            site=self.map_field_value("site", source.sites[rec["siteName"]]),
             os_name=self.map_field_value("os_name", rec["family"]),
             vendor=self.map_field_value("vendor", rec["vendor"]),
             model=self.map_field_value("model", rec["model"]),
@@ -0,0 +1,280 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Export of the IP Fabric collections to columnar files, and the import of
+those files back into a collection.  A file ending in ".parquet" is written
+in the Parquet format; any other file in the Arrow IPC file format, which is
+memory-mapped when imported so that it loads without copying the file.
+
+The file holds either the collection items, or the collection source
+records; the kind, collection name, key fields, and the IPF snapshot id are
+stored in the file schema metadata.
+
+The pyarrow package is an optional dependency, installed with the "arrow"
+extra: pip install nauti-ipfabric[arrow]
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, List, Optional, AnyStr
+from operator import itemgetter
+from pathlib import Path
+import json
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["export_collection", "import_collection"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+META_PREFIX = "nauti."
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa
+        import pyarrow.parquet  # noqa
+
+    except ImportError as exc:
+        raise RuntimeError(
+            "The pyarrow package is required, install nauti-ipfabric[arrow]"
+        ) from exc
+
+    return pyarrow
+
+
+class _TableWriter(object):
+    """
+    Writes the pages of records into the file, one record batch per page.  The
+    schema is inferred from the pages and unified across them, so that a
+    column without a value in the first page is typed by a later page.  The
+    pages are therefore held until every column has a type, or until
+    BUFFER_ROWS rows are held, and then written; any column still without a
+    value is typed as a string.  A page written after the schema is set is
+    cast to the schema, for example a number in a string column.
+    """
+
+    BUFFER_ROWS = 100_000
+
+    def __init__(self, path: AnyStr, metadata: Dict[str, str]):
+        self.pa = _pyarrow()
+        self.path = Path(path)
+        self.metadata = {META_PREFIX + key: value for key, value in metadata.items()}
+        self.schema = None
+        self.writer = None
+        self._pending = list()
+        self._pending_rows = 0
+
+    def write(self, records: List[Dict]):
+        if not records:
+            return
+
+        pa = self.pa
+        records = list(map(dict, records))
+
+        if self.writer is not None:
+            try:
+                table = pa.Table.from_pylist(records, schema=self.schema)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                table = self._conform(pa.Table.from_pylist(records))
+
+            self.writer.write_table(table)
+            return
+
+        table = pa.Table.from_pylist(records)
+        self.schema = (
+            table.schema
+            if self.schema is None
+            else pa.unify_schemas(
+                [self.schema, table.schema], promote_options="permissive"
+            )
+        )
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+
+        if self._pending_rows >= self.BUFFER_ROWS or not any(
+            pa.types.is_null(fld.type) for fld in self.schema
+        ):
+            self._open()
+
+    def _conform(self, table):
+        """ return the table with the columns, and types, of the schema """
+        return table.select(self.schema.names).cast(self.schema)
+
+    def _open(self):
+        pa = self.pa
+
+        # a collection without any records is written as an empty file with
+        # no columns, so that the import results in an empty collection.
+
+        self.schema = pa.schema(
+            [
+                pa.field(fld.name, pa.string()) if pa.types.is_null(fld.type) else fld
+                for fld in (self.schema or [])
+            ],
+            metadata=self.metadata,
+        )
+
+        if self.path.suffix == ".parquet":
+            self.writer = pa.parquet.ParquetWriter(str(self.path), self.schema)
+        else:
+            self.writer = pa.ipc.new_file(str(self.path), self.schema)
+
+        for table in self._pending:
+            self.writer.write_table(self._conform(table))
+
+        self._pending.clear()
+
+    def close(self):
+        if self.writer is None:
+            self._open()
+
+        self.writer.close()
+
+
+async def export_collection(
+    collection,
+    path: AnyStr,
+    records_path: Optional[AnyStr] = None,
+    page_size: Optional[int] = None,
+    **params,
+) -> int:
+    """
+    Fetch the IPF collection records, one page at a time, and write the items
+    of each page into the file at `path`; so that at most one page of records
+    is held in memory.  Records that itemize to None are not exported.
+
+    Parameters
+    ----------
+    collection:
+        The IPF collection instance.
+
+    path:
+        The file of the items.
+
+    records_path:
+        When provided, the source records are also written, to this file.
+
+    page_size: int
+        The number of records per API call.
+
+    Other Parameters
+    ----------------
+    The same parameters accepted by the collection `fetch`.
+
+    Returns
+    -------
+    The number of items exported.
+    """
+    metadata = dict(
+        collection=collection.name,
+        snapshot=collection.source.client.active_snapshot or "",
+        key_fields=json.dumps(list(collection.KEY_FIELDS)),
+    )
+
+    items_writer = _TableWriter(path, dict(metadata, kind="items"))
+    records_writer = (
+        _TableWriter(records_path, dict(metadata, kind="records"))
+        if records_path
+        else None
+    )
+    count = 0
+
+    try:
+        async for page in collection.fetch_pages(page_size=page_size, **params):
+            if records_writer:
+                records_writer.write(page)
+
+            items = collection._itemize_records(page)
+            items_writer.write(items)
+            count += len(items)
+
+    finally:
+        items_writer.close()
+        if records_writer:
+            records_writer.close()
+
+    return count
+
+
+def import_collection(collection, path: AnyStr) -> Dict[str, str]:
+    """
+    Load the file written by `export_collection` into the collection,
+    replacing any existing data; an items file sets the collection items,
+    keyed by the collection KEY_FIELDS, and a records file sets the
+    collection source records, which are keyed by a following `make_keys`.
+    The file is memory-mapped and loaded one record batch at a time, so that
+    only one batch is converted into Python values at a time.
+
+    Returns
+    -------
+    The file metadata: kind, collection, snapshot and key_fields.
+    """
+    pa = _pyarrow()
+    path = Path(path)
+
+    with pa.memory_map(str(path)) as source:
+        if path.suffix == ".parquet":
+            reader = pa.parquet.ParquetFile(source)
+            schema = reader.schema_arrow
+            batches = reader.iter_batches()
+        else:
+            reader = pa.ipc.open_file(source)
+            schema = reader.schema
+            batches = map(reader.get_batch, range(reader.num_record_batches))
+
+        metadata = {
+            key.decode()[len(META_PREFIX) :]: value.decode()
+            for key, value in (schema.metadata or {}).items()
+            if key.decode().startswith(META_PREFIX)
+        }
+
+        if metadata.get("collection") != collection.name:
+            raise ValueError(
+                f"{path} contains collection {metadata.get('collection')}, "
+                f"not {collection.name}"
+            )
+
+        kf_getter = itemgetter(*collection.KEY_FIELDS)
+        is_records = metadata["kind"] == "records"
+
+        collection.items.clear()
+        collection.indexes.clear()
+        collection.source_record_keys.clear()
+        if is_records:
+            collection.source_records.clear()
+
+        for batch in batches:
+            rows = batch.to_pylist()
+
+            if is_records:
+                collection.source_records.extend(rows)
+                continue
+
+            for item in rows:
+                collection._set_item(kf_getter(item), item)
+
+    return metadata
@@ -0,0 +1,128 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Helpers used to compose IPF filter dictionaries, as produced by the
+aioipfabric `parse_filter` function, without the need to create and parse a
+filter expression string.
+
+Examples
+--------
+    The IPF filter equivalent to "hostname in [sw1, sw2]":
+
+        filter_any("hostname", ["sw1", "sw2"])
+
+    Adding that clause to an existing filter:
+
+        filter_all(parse_filter("siteName = atl"), filter_any("hostname", names))
+
+    The same, using the builder and the source compiled filter cache:
+
+        source.filter("siteName = atl").any("hostname", names).build()
+
+The filters returned by a filter compiler are shared by all of its callers,
+and so must not be modified; the helpers here always create new filters.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable, Dict, Iterable, Optional
+from functools import lru_cache
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["filter_any", "filter_all", "create_filter_compiler", "FilterBuilder"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+def filter_any(column: str, values: Iterable, oper: str = "eq") -> Dict:
+    """
+    Return the IPF filter that matches records whose `column` value matches
+    any of the given `values` using the IPF operator `oper`.
+    """
+    clauses = [{column: [oper, value]} for value in values]
+    return clauses[0] if len(clauses) == 1 else {"or": clauses}
+
+
+def filter_all(*filters: Optional[Dict]) -> Optional[Dict]:
+    """
+    Return the IPF filter that matches records matching all of the given
+    `filters`.  Any filter that is None or empty is ignored; if no filters
+    remain then None is returned.
+    """
+    clauses = [flt for flt in filters if flt]
+
+    if not clauses:
+        return None
+
+    return clauses[0] if len(clauses) == 1 else {"and": clauses}
+
+
+def create_filter_compiler(maxsize: Optional[int]) -> Callable[[str], Dict]:
+    """
+    Return a function that compiles a filter expression string into the IPF
+    filter, using the aioipfabric `parse_filter` function.  The compiled
+    filters are memoized, up to `maxsize` expressions, since the same few
+    expressions are typically used for many requests.
+    """
+
+    @lru_cache(maxsize=maxsize)
+    def compile_filter(expr: str) -> Dict:
+        from aioipfabric.filters import parse_filter
+
+        return parse_filter(expr)
+
+    return compile_filter
+
+
+class FilterBuilder(object):
+    """
+    Composes an IPF filter from filters already compiled and from clauses
+    built from values, so that no expression string is created and parsed
+    for each request.  The builder is immutable; each method returns a new
+    builder, so that a base builder can be shared and extended.  The filter
+    matches records matching all of the builder clauses.
+    """
+
+    __slots__ = ("clauses",)
+
+    def __init__(self, *filters: Optional[Dict]):
+        self.clauses = tuple(flt for flt in filters if flt)
+
+    def where(self, *filters: Optional[Dict]) -> "FilterBuilder":
+        """ return a builder with the additional compiled `filters` """
+        return FilterBuilder(*self.clauses, *filters)
+
+    def eq(self, column: str, value, oper: str = "eq") -> "FilterBuilder":
+        """ return a builder with the clause: `column` `oper` `value` """
+        return self.where({column: [oper, value]})
+
+    def any(self, column: str, values: Iterable, oper: str = "eq") -> "FilterBuilder":
+        """ return a builder with the clause: `column` matching any of `values` """
+        return self.where(filter_any(column, values, oper))
+
+    def build(self) -> Optional[Dict]:
+        """ return the IPF filter, or None if the builder has no clauses """
+        return filter_all(*self.clauses)
@@ -0,0 +1,122 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Hashable, List, NamedTuple, Tuple
+from operator import itemgetter
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["Index", "CollectionIndexes"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class Index(NamedTuple):
+    """
+    Declaration of a collection index on one or more item fields.  A unique
+    index maps each value to a single item; when two items have the same
+    value, the last one added is indexed.  A non-unique index maps each value
+    to all of the items having that value.
+    """
+
+    fields: Tuple[str, ...]
+    unique: bool = False
+
+
+class CollectionIndexes(object):
+    """
+    The indexes of a collection, keyed by index name.  Each index maps the
+    item field values, a tuple for a composite index, to the item keys; the
+    indexes are updated as each item is added so that no additional pass
+    over the items is needed.
+
+    A non-unique index value of a single item maps to the item key, rather
+    than to a dict of the keys, so that indexing values that are mostly
+    distinct does not allocate a container per item.
+    """
+
+    def __init__(self, specs: Dict[str, Index]):
+        self.specs = specs
+        self._getters = {name: itemgetter(*spec.fields) for name, spec in specs.items()}
+        self._maps: Dict[str, Dict] = {name: dict() for name in specs}
+        self._unique = [
+            (self._getters[name], self._maps[name])
+            for name, spec in specs.items()
+            if spec.unique
+        ]
+        self._multi = [
+            (self._getters[name], self._maps[name])
+            for name, spec in specs.items()
+            if not spec.unique
+        ]
+
+    def add(self, key: Hashable, item: Dict):
+        """ index the item stored in the collection with the given key """
+        for getter, index in self._unique:
+            index[getter(item)] = key
+
+        for getter, index in self._multi:
+            if (found := index.get(value := getter(item))) is None:
+                index[value] = key
+            elif type(found) is dict:
+                found[key] = None
+            elif found != key:
+                index[value] = {found: None, key: None}
+
+    def discard(self, key: Hashable, item: Dict):
+        """ remove the item, stored with the given key, from the indexes """
+        for getter, index in self._unique:
+            if index.get(value := getter(item)) == key:
+                del index[value]
+
+        for getter, index in self._multi:
+            if (found := index.get(value := getter(item))) is None:
+                continue
+
+            if type(found) is not dict:
+                if found == key:
+                    del index[value]
+                continue
+
+            found.pop(key, None)
+            if len(found) == 1:
+                index[value] = next(iter(found))
+
+    def clear(self):
+        for index in self._maps.values():
+            index.clear()
+
+    def keys(self, name: str, value) -> List[Hashable]:
+        """ return the keys of the items having the index value """
+        found = self._maps[name].get(value)
+
+        if found is None:
+            return []
+
+        return list(found) if type(found) is dict else [found]
+
+    def __bool__(self):
+        return bool(self.specs)
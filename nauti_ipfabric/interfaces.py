@@ -17,23 +17,21 @@
 # System Imports
 # -----------------------------------------------------------------------------
 
-from typing import Dict, Optional
-import re
-
-# -----------------------------------------------------------------------------
-# Public Imports
-# -----------------------------------------------------------------------------
-
-from aioipfabric.filters import parse_filter
+from typing import Dict, List, Optional, Callable
+from functools import partial
+from types import SimpleNamespace
 
 # -----------------------------------------------------------------------------
 # Private Imports
 # -----------------------------------------------------------------------------
 
-from nauti.collection import Collection, CollectionCallback, get_collection
+from nauti.collection import Collection, CollectionCallback
 from nauti.collections.interfaces import InterfaceCollection
 from nauti_ipfabric.source import IPFabricSource
-from nauti.mappings import normalize_hostname
+from nauti_ipfabric.collection import IPFabricCollectionMixin
+from nauti_ipfabric.indexes import Index
+from nauti_ipfabric.filters import filter_any, filter_all
+from nauti_ipfabric.normalizers import NormalizerDispatch
 
 # -----------------------------------------------------------------------------
 # Exports
@@ -48,75 +46,149 @@ __all__ = ["IPFabricInterfaceCollection"]
 #
 # -----------------------------------------------------------------------------
 
-_exos_port_match = re.compile(r'(\d+):(\d+)').match
-
-class IPFabricInterfaceCollection(Collection, InterfaceCollection):
+class IPFabricInterfaceCollection(
+    IPFabricCollectionMixin, Collection, InterfaceCollection
+):
     source_class = IPFabricSource
 
+    COLUMNS = ("hostname", "intName", "dscr", "siteName", "primaryIp")
+
+    # the interfaces of a device, or of a site.
+
+    INDEXES = dict(hostname=Index(("hostname",)), site=Index(("site",)))
+
+    # the item hostnames are normalized, e.g. without the domain name, so the
+    # records are selected using a "like" match on the IPF hostname.
+
+    ITEMS_FILTER = ("hostname", "like")
+
+    # the device os_name, used by itemize, is obtained from the devices.
+
+    DEPENDS = ("devices",)
+
+    def _fetcher(self) -> Callable:
+        return partial(
+            self.source.client.fetch_table,
+            url="/tables/inventory/interfaces",
+            columns=list(self.COLUMNS),
+        )
+
     async def fetch(self, **params):
         """
-        params['hostname'] must be set to the hostname we want to fetch.
+        params['hostname'] may be set to a hostname, or a list of hostnames,
+        that we want to fetch.  When the list contains more than
+        params['batch_size'] hostnames (default source batch_size), the
+        hostnames are fetched in batches that run concurrently; limited to
+        params['concurrency'] (default source concurrency).
+        """
+        hostnames = params.get('hostname')
+        batch_size = params.pop('batch_size', None) or self.source.batch_size
+        concurrency = params.pop('concurrency', None)
+
+        if isinstance(hostnames, (str, type(None))) or len(hostnames) <= batch_size:
+            return await super().fetch(**params)
+
+        # when fetching many batches, the complete device inventory is used
+        # rather than fetching the devices of each batch.
+
+        hostnames = list(params.pop('hostname'))
+        self.cache['devices'] = await self.source.device_cache.get()
+        self._prepare_itemize()
+        await super()._prepare_fetch(params)
+        base_filters = params.pop('filters', None)
+
+        await self.fetch_batches(
+            [
+                dict(
+                    params,
+                    filters=filter_all(
+                        base_filters,
+                        filter_any('hostname', hostnames[start:start + batch_size]),
+                    ),
+                )
+                for start in range(0, len(hostnames), batch_size)
+            ],
+            concurrency=concurrency,
+        )
+
+    async def _prepare_fetch(self, params: Dict) -> None:
+        """
+        params['hostname'] may be set to the hostname, or list of hostnames,
+        we want to fetch.
         params['filters'] must be set to the IPF parsable-filter
         """
 
         # We want to know information about the device, such as os_name, and we
-        # will key this collection by the hostname value
+        # will key this collection by the hostname value.  The devices are
+        # obtained from the source device cache that is shared by all
+        # collections.
 
-        dev_col = self.cache.setdefault('devices', get_collection(source=self.source, name='devices'))
+        host_filter = None
 
         if (hostname := params.pop('hostname', None)) is not None:
-            await dev_col.fetch(filters=f"hostname = '{hostname}'")
+            hostnames = [hostname] if isinstance(hostname, str) else hostname
+            host_filter = dev_filters = filter_any('hostname', hostnames)
         else:
-            await dev_col.fetch(**params)
+            dev_filters = params.get("filters")
 
-        dev_col.make_keys('hostname')
+        self.cache['devices'] = await self.source.device_cache.get(filters=dev_filters)
+        self._prepare_itemize()
 
-        if (filters := params.get("filters")) is not None:
-            params["filters"] = parse_filter(filters)
+        await super()._prepare_fetch(params)
 
-        records = await self.source.client.fetch_table(
-            url="/tables/inventory/interfaces",
-            columns=["hostname", "intName", "dscr", "siteName", "l1", "primaryIp"],
-            **params,
-        )
+        if host_filter:
+            params['filters'] = filter_all(params.get('filters'), host_filter)
 
-        self.source_records.extend(records)
+    def _itemize_cache(self) -> Dict:
+        # itemize only uses the device os_name values.
+        devices = self.cache['devices'].items
+        return {
+            'devices': SimpleNamespace(
+                items={
+                    host: dict(os_name=dev['os_name']) for host, dev in devices.items()
+                }
+            )
+        }
 
-    async def fetch_items(self, items: Dict):
-        raise NotImplementedError()
+    def _prepare_itemize(self):
+        # the interface normalizer of each device is resolved from the device
+        # os_name; devices without a normalizer use the interface expander.
+        # The normalizers are keyed by the IPF hostname, so that itemize does
+        # not need to normalize the hostname to find the normalizer.
 
-    def itemize(self, rec: Dict) -> Dict:
-        hostname = normalize_hostname(rec['hostname']).lower()          # hostnames always used in lowercase form.
-        orig_if_name = rec['intName']
-        os_name = self.cache['devices'].items[hostname]['os_name']
+        hostnames = self.source.hostnames
+        expand = self.source.expands['interface']
+        devices = self.cache['devices'].items
 
-        # TODO: this is a bit of a hack for now, but we'll need to address how we want to
-        #       perform mapping and filtering in more of a plugin/config-file mannter.
+        # hostnames always used in lowercase form to find the device.
 
-        if os_name == 'exos':
-            # if this is a physical port, it will take the form "<switch_id>:<port_id>"
-            if (mo := _exos_port_match(orig_if_name)):
-                sw_id, port_id = mo.groups()
-                if_name = f'Ethernet{port_id}' if sw_id == '1' else f'Ethernet{sw_id}/{port_id}'
+        def os_names(ipf_hostname):
+            return devices[hostnames[ipf_hostname].lower()]['os_name']
 
-            # otherwise this is a "VLAN" port, and we only want to keep those
-            # that have an IP address assigned.  Other "VLAN ports" are just
-            # VLANs and do not constitute a port.  EXOS joy.
+        self.cache['if_normalizers'] = NormalizerDispatch(
+            os_names=os_names,
+            normalizers=self.source.if_normalizers,
+            default=lambda if_name, rec: expand(if_name),
+        )
 
-            else:
-                if not rec['primaryIp']:
-                    return None
+    def _itemize_depends(self, records: List[Dict]) -> Dict:
+        # the interface names are normalized by the device os_name.
+        os_names = self.cache['if_normalizers'].os_names
+        return {host: os_names(host) for host in {rec['hostname'] for rec in records}}
 
-                if_name = orig_if_name
+    def itemize(self, rec: Dict) -> Dict:
+        source = self.source
+        ipf_hostname = rec['hostname']
+        normalizer = self.cache['if_normalizers'][ipf_hostname]
 
-        else:
-            if_name = self.source.expands["interface"](orig_if_name)
+        if (if_name := normalizer(rec['intName'], rec)) is None:
+            return None
 
         return {
             "interface": if_name,
-            "hostname": normalize_hostname(rec["hostname"]),
+            "hostname": source.hostnames[ipf_hostname],
             "description": rec["dscr"] or "",
-            "site": rec["siteName"],
+            "site": source.sites[rec["siteName"]],
         }
 
     async def add_items(
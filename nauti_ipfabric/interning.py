@@ -0,0 +1,87 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable, Dict, Hashable, Optional
+import sys
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["InternMap", "intern_item"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class InternMap(dict):
+    """
+    Memo of the canonical form of the values of a record field, for example
+    the normalized hostname of each IPF hostname, keyed by the IPF value.
+    The canonical value is created, and interned, the first time the IPF
+    value is used; so that itemize does a single dict lookup per field, and
+    the items of all collections share one string object per distinct value
+    rather than each holding its own copy.
+
+    The number of distinct hostnames and sites is small relative to the number
+    of records, so the memo is not bounded.
+    """
+
+    __slots__ = ("canonical",)
+
+    def __init__(self, canonical: Optional[Callable] = None):
+        """
+        Parameters
+        ----------
+        canonical:
+            Function returning the canonical form of an IPF value; when not
+            provided the IPF value is used as-is.
+        """
+        super().__init__()
+        self.canonical = canonical
+
+    def __missing__(self, value: Hashable):
+        canon = self.canonical(value) if self.canonical else value
+
+        if isinstance(canon, str):
+            canon = sys.intern(canon)
+
+        self[value] = canon
+        return canon
+
+
+def intern_item(item: Optional[Dict]) -> Optional[Dict]:
+    """
+    Return the item with its field names and string values interned; used for
+    the items unpickled from the itemize worker processes, which otherwise
+    each hold their own copy of the strings the itemize memos share.
+    """
+    if item is None:
+        return None
+
+    intern = sys.intern
+
+    return {
+        intern(field): intern(value) if type(value) is str else value
+        for field, value in item.items()
+    }
@@ -17,13 +17,8 @@
 # System Imports
 # -----------------------------------------------------------------------------
 
-from typing import Dict, Optional
-
-# -----------------------------------------------------------------------------
-# Public Imports
-# -----------------------------------------------------------------------------
-
-from aioipfabric.filters import parse_filter
+from typing import Dict, Optional, Callable
+from functools import partial
 
 # -----------------------------------------------------------------------------
 # Private Imports
@@ -32,7 +27,8 @@ from aioipfabric.filters import parse_filter
 from nauti.collection import Collection, CollectionCallback
 from nauti.collections.ipaddrs import IPAddrCollection
 from nauti_ipfabric.source import IPFabricSource
-from nauti.mappings import normalize_hostname
+from nauti_ipfabric.collection import IPFabricCollectionMixin
+from nauti_ipfabric.indexes import Index
 
 # -----------------------------------------------------------------------------
 # Exports
@@ -48,25 +44,34 @@ __all__ = ["IPFabricIPAddrCollection"]
 # -----------------------------------------------------------------------------
 
 
-class IPFabricIPAddrCollection(Collection, IPAddrCollection):
+class IPFabricIPAddrCollection(IPFabricCollectionMixin, Collection, IPAddrCollection):
 
     source_class = IPFabricSource
 
-    async def fetch(self, **params):
+    COLUMNS = ("hostname", "intName", "siteName", "ip", "net")
 
-        if (filters := params.get("filters")) is not None:
-            params["filters"] = parse_filter(filters)
+    # the IP addresses of a device interface, and the interfaces having the
+    # same IP address, for example anycast addresses.
 
-        self.source_records.extend(
-            await self.source.client.fetch_table(
-                url="tables/addressing/managed-devs",
-                columns=["hostname", "intName", "siteName", "ip", "net"],
-                **params,
-            )
+    INDEXES = dict(
+        interface=Index(("hostname", "interface")),
+        ipaddr=Index(("ipaddr",)),
+    )
+
+    # the records are selected by the IP address of the item key; the
+    # ipaddr key value is in the form "<ip>/<prefix-length>".
+
+    ITEMS_FILTER = ("ip", "eq")
+
+    def _fetcher(self) -> Callable:
+        return partial(
+            self.source.client.fetch_table,
+            url="tables/addressing/managed-devs",
+            columns=list(self.COLUMNS),
         )
 
-    async def fetch_items(self, items: Dict):
-        raise NotImplementedError()
+    def _item_filter_value(self, key) -> str:
+        return key[self.KEY_FIELDS.index("ipaddr")].split("/")[0]
 
     def itemize(self, rec: Dict) -> Dict:
         try:
@@ -74,11 +79,13 @@ class IPFabricIPAddrCollection(Collection, IPAddrCollection):
         except AttributeError:
             pflen = "32"
 
+        source = self.source
+
         return {
             "ipaddr": f"{rec['ip']}/{pflen}",
-            "interface": self.source.expands["interface"](rec["intName"]),  # noqa
-            "hostname": normalize_hostname(rec["hostname"]),
-            "site": rec["siteName"],
+            "interface": source.expands["interface"](rec["intName"]),
+            "hostname": source.hostnames[rec["hostname"]],
+            "site": source.sites[rec["siteName"]],
         }
 
     async def add_items(
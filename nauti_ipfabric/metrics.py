@@ -0,0 +1,174 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Instrumentation of the IP Fabric source and collections.  The source and its
+collections emit events to the source `metrics` hook, which calls each of the
+subscribed callbacks as `callback(event, fields)`; with no callback subscribed
+the measurements are skipped.  The events, and their fields, are:
+
+    request: table, seconds, decode_seconds, bytes, wire_bytes, rows, cached
+    page:    table, page, rows
+    retry:   table, status, delay
+    itemize: collection, records, items, seconds
+
+The request `bytes` is the decoded response size, and `wire_bytes` the size
+received.  The MetricsRecorder aggregates the events and renders them in the
+Prometheus text format; other exporters can be subscribed as callbacks.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable, Dict, List, Optional
+from collections import defaultdict
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["MetricsHook", "MetricsRecorder"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+MetricsCallback = Callable[[str, Dict], None]
+
+
+class MetricsHook(object):
+    """ Dispatches the instrumentation events to the subscribed callbacks """
+
+    __slots__ = ("_callbacks",)
+
+    def __init__(self):
+        self._callbacks: List[MetricsCallback] = list()
+
+    def subscribe(self, callback: MetricsCallback):
+        """ add the callback, called as `callback(event, fields)` """
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: MetricsCallback):
+        """ remove the callback """
+        self._callbacks.remove(callback)
+
+    def emit(self, event: str, **fields):
+        """ call each of the callbacks with the event and its fields """
+        for callback in self._callbacks:
+            callback(event, fields)
+
+    def __bool__(self):
+        return bool(self._callbacks)
+
+
+class MetricsRecorder(object):
+    """
+    Metrics callback that aggregates the events; `tables` holds the request
+    totals keyed by table name, and `collections` the itemize totals keyed by
+    collection name.
+
+    Examples
+    --------
+        recorder = MetricsRecorder()
+        source.metrics.subscribe(recorder)
+        ...
+        print(recorder.to_prometheus(source.expander_stats()))
+    """
+
+    TABLE_FIELDS = (
+        "requests",
+        "cached",
+        "seconds",
+        "decode_seconds",
+        "bytes",
+        "wire_bytes",
+        "rows",
+        "pages",
+        "retries",
+    )
+
+    COLLECTION_FIELDS = ("records", "items", "seconds")
+
+    def __init__(self):
+        self.tables: Dict[str, Dict] = defaultdict(
+            dict.fromkeys(self.TABLE_FIELDS, 0).copy
+        )
+        self.collections: Dict[str, Dict] = defaultdict(
+            dict.fromkeys(self.COLLECTION_FIELDS, 0).copy
+        )
+
+    def __call__(self, event: str, fields: Dict):
+        if (handler := getattr(self, f"_on_{event}", None)) is not None:
+            handler(**fields)
+
+    def _on_request(
+        self, table, seconds, decode_seconds, bytes, wire_bytes, rows, cached
+    ):
+        totals = self.tables[table]
+        totals["requests"] += 1
+        totals["cached"] += cached
+        totals["seconds"] += seconds
+        totals["decode_seconds"] += decode_seconds
+        totals["bytes"] += bytes
+        totals["wire_bytes"] += wire_bytes
+        totals["rows"] += rows
+
+    def _on_page(self, table, page, rows):
+        self.tables[table]["pages"] += 1
+
+    def _on_retry(self, table, status, delay):
+        self.tables[table]["retries"] += 1
+
+    def _on_itemize(self, collection, records, items, seconds):
+        totals = self.collections[collection]
+        totals["records"] += records
+        totals["items"] += items
+        totals["seconds"] += seconds
+
+    def reset(self):
+        self.tables.clear()
+        self.collections.clear()
+
+    def to_prometheus(self, expander_stats: Optional[Dict[str, Dict]] = None) -> str:
+        """
+        Return the aggregates in the Prometheus text exposition format; the
+        source `expander_stats()` may be provided to include the expander
+        memoization counters.
+        """
+        lines = list()
+        expander_stats = expander_stats or {}
+
+        def add(metric, kind, label, rows):
+            name = f"nauti_ipfabric_{metric}"
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f'{name}{{{label}="{key}"}} {value}' for key, value in rows)
+
+        for field in self.TABLE_FIELDS:
+            rows = [(table, totals[field]) for table, totals in self.tables.items()]
+            add(f"table_{field}_total", "counter", "table", rows)
+
+        for field in self.COLLECTION_FIELDS:
+            rows = [(name, totals[field]) for name, totals in self.collections.items()]
+            add(f"itemize_{field}_total", "counter", "collection", rows)
+
+        for field in ("hits", "misses", "currsize"):
+            rows = [(name, stats[field]) for name, stats in expander_stats.items()]
+            add(f"expander_{field}", "gauge", "expander", rows)
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,145 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Interface name normalizers, selected by the device os_name.  A normalizer is
+a function called as `normalizer(if_name, rec)` with the IPF interface name
+and the interface table record, that returns the normalized interface name,
+or None when the interface is to be excluded from the collection.  Devices
+whose os_name has no normalizer use the "interface" expander of the source.
+
+Normalizers are provided, in addition to those built in, by the source option
+"INTERFACE_NORMALIZERS", a dict of os_name to "module:function", for example:
+
+    INTERFACE_NORMALIZERS = { nxos = "mypackage.ifnames:normalize_nxos" }
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable, Dict, Optional
+from functools import lru_cache
+from importlib import import_module
+import re
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "BUILTIN_NORMALIZERS",
+    "NormalizerDispatch",
+    "load_normalizers",
+    "normalize_exos",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+Normalizer = Callable[[str, Dict], Optional[str]]
+
+_exos_port_match = re.compile(r"(\d+):(\d+)").match
+
+
+@lru_cache(maxsize=None)
+def _exos_port_name(if_name: str) -> Optional[str]:
+    """ return the name of an EXOS physical port, or None if not a port """
+    if (mo := _exos_port_match(if_name)) is None:
+        return None
+
+    sw_id, port_id = mo.groups()
+    return f"Ethernet{port_id}" if sw_id == "1" else f"Ethernet{sw_id}/{port_id}"
+
+
+def normalize_exos(if_name: str, rec: Dict) -> Optional[str]:
+    """
+    EXOS physical ports take the form "<switch_id>:<port_id>", and are named
+    "Ethernet<port_id>", or "Ethernet<switch_id>/<port_id>" for a switch
+    other than the first of a stack.  Any other interface is a "VLAN port",
+    which is only kept when it has an IP address assigned; otherwise it is
+    just a VLAN and does not constitute a port.
+    """
+    if (port_name := _exos_port_name(if_name)) is not None:
+        return port_name
+
+    return if_name if rec["primaryIp"] else None
+
+
+BUILTIN_NORMALIZERS: Dict[str, Normalizer] = {"exos": normalize_exos}
+
+
+def load_normalizers(config: Optional[Dict[str, str]] = None) -> Dict[str, Normalizer]:
+    """
+    Return the normalizers keyed by os_name; those built in, updated by the
+    `config` dict of os_name to "module:function" normalizer names.
+    """
+    normalizers = dict(BUILTIN_NORMALIZERS)
+
+    for os_name, spec in (config or {}).items():
+        mod_name, _, func_name = spec.partition(":")
+        try:
+            normalizers[os_name] = getattr(import_module(mod_name), func_name)
+        except (ImportError, AttributeError) as exc:
+            raise RuntimeError(
+                f"Unable to load interface normalizer for {os_name}: {spec}"
+            ) from exc
+
+    return normalizers
+
+
+class NormalizerDispatch(dict):
+    """
+    Dispatch table of the interface normalizer of each device, keyed by
+    hostname.  The normalizer of a device is resolved, from the device
+    os_name, the first time the hostname is used, so that itemize does a
+    single dict lookup per record rather than a per-record os_name check.
+
+    The records are not grouped by device to normalize the interface names
+    in bulk; with the normalizer resolved once per device, grouping does not
+    reduce the per-record work, and the normalizers take a single name.
+    """
+
+    def __init__(
+        self,
+        os_names: Callable[[str], str],
+        normalizers: Dict[str, Normalizer],
+        default: Normalizer,
+    ):
+        """
+        Parameters
+        ----------
+        os_names:
+            Function returning the os_name of the given hostname.
+
+        normalizers:
+            The normalizers keyed by os_name.
+
+        default:
+            The normalizer of the devices whose os_name has no normalizer.
+        """
+        super().__init__()
+        self.os_names = os_names
+        self.normalizers = normalizers
+        self.default = default
+
+    def __missing__(self, hostname: str) -> Normalizer:
+        os_name = self.os_names(hostname)
+        normalizer = self[hostname] = self.normalizers.get(os_name, self.default)
+        return normalizer
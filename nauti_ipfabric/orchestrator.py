@@ -0,0 +1,180 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Fetch of many IP Fabric collections, for example a full inventory sync, over
+one IPFabricSource.  Each collection class declares, in DEPENDS, the names of
+the collections that must be fetched before it; for example the interfaces
+collection depends on the devices for the device os_name.  The collections
+are fetched concurrently, each starting as soon as the collections it
+depends on are fetched.
+
+The devices collection is shared with the other collections by the source
+device cache; when the devices collection is requested, its items are used
+to prime the device cache so that the devices table is fetched once.  When
+the devices are only a dependency, the device cache is used to fetch them.
+
+Examples
+--------
+    collections = await fetch_collections(
+        source, ["interfaces", "ipaddrs", "devices", "sites"]
+    )
+    interfaces = collections["interfaces"]
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Iterable, List, Optional
+import asyncio
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from nauti.collection import Collection, get_collection
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["fetch_collections", "dependency_order"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+DEVICES = "devices"
+
+
+def dependency_order(depends: Dict[str, Iterable[str]]) -> List[str]:
+    """
+    Return the collection names of the `depends` graph, a dict of name to the
+    names it depends on, ordered so that each name follows the names it
+    depends on.  A ValueError is raised if the graph has a cycle.
+    """
+    order = list()
+    state = dict()  # name -> False while visiting, True once ordered.
+
+    def visit(name, path):
+        if (done := state.get(name)) is not None:
+            if not done:
+                raise ValueError(
+                    f"Collection dependency cycle: {' -> '.join(path + [name])}"
+                )
+            return
+
+        state[name] = False
+        for dep in depends.get(name, ()):
+            visit(dep, path + [name])
+
+        state[name] = True
+        order.append(name)
+
+    for name in depends:
+        visit(name, [])
+
+    return order
+
+
+async def fetch_collections(
+    source,
+    names: Iterable[str],
+    stream: bool = False,
+    collection_params: Optional[Dict[str, Dict]] = None,
+    **params,
+) -> Dict[str, Collection]:
+    """
+    Fetch the IPF collections, and any collections they depend on, and key
+    their items.  Independent collections are fetched concurrently; the
+    number of concurrent table requests is governed by the source.
+
+    Parameters
+    ----------
+    source: IPFabricSource
+        The source instance, logged in.
+
+    names:
+        The names of the collections, for example ["devices", "interfaces"].
+
+    stream: bool
+        When True, the collections are fetched using `fetch_inventory`, so
+        that the source records are not retained; otherwise by `fetch`
+        followed by `make_keys`.
+
+    collection_params:
+        The fetch parameters of each collection, keyed by name, in addition
+        to the `params` used for all of the collections.
+
+    Other Parameters
+    ----------------
+    The fetch parameters used for all of the collections, for example the
+    "filters" expression selecting a site.
+
+    Returns
+    -------
+    The requested collections keyed by name.
+    """
+    requested = list(dict.fromkeys(names))
+    collection_params = collection_params or {}
+
+    # create the collections, and those they depend on, to build the
+    # dependency graph from the collection class DEPENDS.
+
+    collections = dict()
+    pending = list(requested)
+
+    while pending:
+        if (name := pending.pop()) not in collections:
+            collections[name] = get_collection(source=source, name=name)
+            pending.extend(collections[name].DEPENDS)
+
+    depends = {name: col.DEPENDS for name, col in collections.items()}
+    tasks: Dict[str, asyncio.Future] = dict()
+
+    async def fetch_one(name: str):
+        await asyncio.gather(*(tasks[dep] for dep in depends[name]))
+
+        col = collections[name]
+        fetch_params = {**params, **collection_params.get(name, {})}
+
+        if name == DEVICES and name not in requested:
+            await source.device_cache.get(filters=fetch_params.get("filters"))
+            return
+
+        if stream:
+            await col.fetch_inventory(**fetch_params)
+        else:
+            await col.fetch(**fetch_params)
+            col.make_keys()
+
+        if name == DEVICES:
+            source.device_cache.prime(col, filters=fetch_params.get("filters"))
+
+    for name in dependency_order(depends):
+        tasks[name] = asyncio.ensure_future(fetch_one(name))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    return {name: collections[name] for name in requested}
@@ -0,0 +1,142 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Itemize the collection records using a pool of worker processes, so that the
+itemize of a very large collection uses more than one core and does not block
+the event loop.
+
+Each worker process is initialized, once, with the state used by the
+collection `itemize`: the collection class, the field maps, the expands
+mappings, the interface normalizer names, and the subset of the collection
+cache returned by the collection `_itemize_cache`, for example the device
+os_name values.  The worker creates a "detached" instance of the collection
+from this state, without a source connection, and itemizes the records sent
+to it.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import asyncio
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+from nauti.mappings import normalize_hostname
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from nauti_ipfabric.source import create_expanders
+from nauti_ipfabric.normalizers import load_normalizers
+from nauti_ipfabric.interning import InternMap
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["itemize_parallel"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# the detached collection instance of the worker process.
+
+_collection = None
+
+
+def _init_worker(
+    col_class, maps: Dict, expander_config, normalizer_config: Dict, cache: Dict
+):
+    """ worker process initializer; creates the detached collection """
+    global _collection
+
+    expands, deflates = create_expanders(*expander_config)
+
+    _collection = col_class.__new__(col_class)
+    _collection.source = SimpleNamespace(
+        expands=expands,
+        deflates=deflates,
+        if_normalizers=load_normalizers(normalizer_config),
+        hostnames=InternMap(normalize_hostname),
+        sites=InternMap(),
+    )
+    _collection.maps = maps
+    _collection.cache = cache
+    _collection._prepare_itemize()
+
+
+def _itemize_chunk(records: List[Dict]) -> List[Optional[Dict]]:
+    """ worker process function; return the items of the records """
+    return list(map(_collection.itemize, records))
+
+
+async def itemize_parallel(
+    collection, records: List[Dict], processes: int, chunk_size: int
+) -> List[Optional[Dict]]:
+    """
+    Return the items of the collection records, in the order of the records,
+    itemized by a pool of `processes` worker processes.  The records are sent
+    to the workers in chunks of `chunk_size` records.
+
+    Parameters
+    ----------
+    collection:
+        The IPF collection instance, prepared for itemize; that is after the
+        records have been fetched.
+
+    records:
+        The source records to itemize.
+
+    processes: int
+        The number of worker processes.
+
+    chunk_size: int
+        The number of records per worker call.
+    """
+    loop = asyncio.get_running_loop()
+
+    initargs = (
+        type(collection),
+        collection.maps,
+        collection.source.expander_config,
+        collection.source.normalizer_config,
+        collection._itemize_cache(),
+    )
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker, initargs=initargs
+    ) as pool:
+        chunks = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    pool, _itemize_chunk, records[start : start + chunk_size]
+                )
+                for start in range(0, len(records), chunk_size)
+            )
+        )
+
+    return [item for chunk in chunks for item in chunk]
@@ -13,16 +13,14 @@
 #      You should have received a copy of the GNU General Public License
 #      along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from typing import Dict, Optional
+from typing import Dict, Optional, List, Callable
+from functools import partial
 
-from aioipfabric.filters import parse_filter
-from aioipfabric.mixins.portchan import IPFPortChannelsMixin
-
-from nauti.collection import Collection, CollectionCallback, get_collection
+from nauti.collection import Collection, CollectionCallback
 from nauti.collections.portchans import PortChannelCollection
-from nauti_ipfabric.source import IPFabricSource, IPFabricClient
-
-from nauti.mappings import normalize_hostname
+from nauti_ipfabric.source import IPFabricSource
+from nauti_ipfabric.collection import IPFabricCollectionMixin
+from nauti_ipfabric.indexes import Index
 
 
 # -----------------------------------------------------------------------------
@@ -39,32 +37,60 @@ __all__ = ["IPFabricPortChannelCollection"]
 # -----------------------------------------------------------------------------
 
 
-class IPFabricPortChannelCollection(Collection, PortChannelCollection):
+class IPFabricPortChannelCollection(
+    IPFabricCollectionMixin, Collection, PortChannelCollection
+):
     source_class = IPFabricSource
 
-    async def fetch(self, **params):
+    # the 'members' column is transformed into the 'intName' of each member
+    # and the port-channel 'intName' becomes 'portchan'; see `_xf_records`.
+
+    COLUMNS = ("hostname", "intName", "members")
+
+    # the member interfaces of a device port-channel.
+
+    INDEXES = dict(portchan=Index(("hostname", "portchan")))
+
+    # the item hostnames are normalized, e.g. without the domain name, so the
+    # records are selected using a "like" match on the IPF hostname.
+
+    ITEMS_FILTER = ("hostname", "like")
+
+    # the devices are used to filter the port-channels by device attributes.
 
-        # going to fetch the associated devices and store them into the
-        # collection cache so that these items/values can be used for filtering
-        # purposes.  For example, the User may want to filter out port-channels
-        # based on device model/family.
+    DEPENDS = ("devices",)
 
-        dev_col = self.cache['devices'] = get_collection(source=self.source, name='devices')
-        await dev_col.fetch(**params)
-        dev_col.make_keys('hostname')
+    def _fetcher(self) -> Callable:
+        # the aioipfabric port-channel mixin is imported on first use, rather
+        # than when the plugin module is imported.
 
-        api: IPFabricClient(IPFPortChannels) = self.source.client
-        api.mixin(IPFPortChannelsMixin)
+        from aioipfabric.mixins.portchan import IPFPortChannelsMixin
 
-        if (filters := params.get("filters")) is not None:
-            params["filters"] = parse_filter(filters)
+        api = self.source.client
+        if not isinstance(api, IPFPortChannelsMixin):
+            api.mixin(IPFPortChannelsMixin)
 
-        records = await api.fetch_portchannels(**params)
-        api.xf_portchannel_members(records)
+        return partial(api.fetch_portchannels, columns=list(self.COLUMNS))
+
+    async def _prepare_fetch(self, params: Dict) -> None:
+
+        # going to obtain the associated devices, from the source device cache,
+        # and store them into the collection cache so that these items/values
+        # can be used for filtering purposes.  For example, the User may want to
+        # filter out port-channels based on device model/family.
+
+        self.cache['devices'] = await self.source.device_cache.get(
+            filters=params.get("filters")
+        )
+
+        await super()._prepare_fetch(params)
+
+    def _xf_records(self, records: List[Dict]) -> List[Dict]:
+        self.source.client.xf_portchannel_members(records)
 
         # invert these records to a flat list of fields.
 
-        xf_records = [
+        return [
             dict(
                 hostname=rec["hostname"],
                 intName=member["intName"],
@@ -74,16 +100,12 @@ class IPFabricPortChannelCollection(Collection, PortChannelCollection):
             for member in rec["members"]
         ]
 
-        self.source_records.extend(xf_records)
-
-    async def fetch_items(self, items: Dict):
-        raise NotImplementedError()
-
     def itemize(self, rec: Dict) -> Dict:
-        exp_ifn = self.source.expands["interface"]  # noqa
+        source = self.source
+        exp_ifn = source.expands["interface"]
 
         return dict(
-            hostname=normalize_hostname(rec["hostname"]),
+            hostname=source.hostnames[rec["hostname"]],
             interface=exp_ifn(rec["intName"]),
             portchan=exp_ifn(rec["portchan"]),
         )
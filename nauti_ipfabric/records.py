@@ -0,0 +1,121 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Tuple, Iterable, Any
+from collections.abc import Mapping
+import sys
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["RecordSchema", "CompactRecord", "CompactRecordList", "compact_record"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class RecordSchema(object):
+    """
+    The column names shared by all of the compact records having the same
+    keys, so that the keys are stored once rather than in every record.
+    """
+
+    __slots__ = ("columns", "index")
+
+    def __init__(self, columns: Tuple[str, ...]):
+        self.columns = columns
+        self.index = {col: pos for pos, col in enumerate(columns)}
+
+
+class CompactRecord(Mapping):
+    """
+    Read-only mapping used in place of a dict to store a record.  The record
+    holds only the tuple of values and a reference to its schema; providing
+    the same mapping access as a dict, e.g. rec['hostname'], rec.get('snHw'),
+    and comparing equal to a dict with the same items.
+    """
+
+    __slots__ = ("_schema", "_values")
+
+    def __init__(self, schema: RecordSchema, values: Tuple):
+        self._schema = schema
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._schema.index[key]]
+
+    def __iter__(self):
+        return iter(self._schema.columns)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._schema.index
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self)})"
+
+    def __getstate__(self):
+        return self._schema.columns, self._values
+
+    def __setstate__(self, state):
+        columns, self._values = state
+        self._schema = _schema_for(columns)
+
+
+_schemas: Dict[Tuple[str, ...], RecordSchema] = dict()
+
+
+def _schema_for(columns: Tuple[str, ...]) -> RecordSchema:
+    """ return the shared schema for the given column names """
+    if (schema := _schemas.get(columns)) is None:
+        schema = _schemas[columns] = RecordSchema(columns)
+    return schema
+
+
+def _intern(value: Any) -> Any:
+    """ intern string values so that repeated values share one object """
+    return sys.intern(value) if type(value) is str else value
+
+
+def compact_record(rec: Mapping) -> CompactRecord:
+    """ return the CompactRecord for the given dict record """
+    if isinstance(rec, CompactRecord):
+        return rec
+
+    return CompactRecord(_schema_for(tuple(rec)), tuple(map(_intern, rec.values())))
+
+
+class CompactRecordList(list):
+    """
+    List used in place of the Collection `source_records` list so that each
+    record stored is converted into a CompactRecord.
+    """
+
+    def append(self, rec: Mapping):
+        super().append(compact_record(rec))
+
+    def extend(self, records: Iterable[Mapping]):
+        super().extend(map(compact_record, records))
@@ -0,0 +1,165 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import List, Dict, Optional, AnyStr
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import marshal
+import zlib
+import sys
+import os
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["ResponseCache", "dump_records", "load_records"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# marshal data is specific to the Python version, so the version is made part
+# of the cache key so that a different interpreter never reads the file.
+
+_FORMAT_VERSION = f"1:{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def dump_records(records: List[Dict]) -> bytes:
+    """
+    Encode the list of table records into a compact binary form.  The records
+    are stored by column, that is the column names once followed by a tuple of
+    values per record, rather than repeating the keys of every record.
+    """
+    columns = list(dict.fromkeys(key for rec in records for key in rec))
+    rows = [tuple(rec.get(col) for col in columns) for rec in records]
+    return zlib.compress(marshal.dumps((columns, rows)), 1)
+
+
+def load_records(data: bytes) -> List[Dict]:
+    """ decode the binary form created by `dump_records` """
+    columns, rows = marshal.loads(zlib.decompress(data))
+    return [dict(zip(columns, row)) for row in rows]
+
+
+class ResponseCache(object):
+    """
+    On-disk cache of IPF table responses.  IPF snapshots are immutable once
+    loaded, so a response for a given snapshot, table, columns and filter
+    never changes and can be served locally on any subsequent run.
+
+    Each response is stored in its own file, named by the hash of the
+    request key.  The total size of the cache is bounded by evicting the
+    least recently used files, using the file modified time as the last use.
+    """
+
+    FILE_SUFFIX = ".ipfc"
+
+    def __init__(self, directory: AnyStr, max_size: int):
+        """
+        Parameters
+        ----------
+        directory:
+            The filesystem directory storing the cache files; created if it
+            does not exist.
+
+        max_size: int
+            The maximum number of bytes used by the cache files.
+        """
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+
+        # `_files` maps file name to file size, ordered least to most recently
+        # used; initialized from the existing files so that the cache persists
+        # across runs.
+
+        files = sorted(
+            self.directory.glob("*" + self.FILE_SUFFIX), key=lambda f: f.stat().st_mtime
+        )
+        self._files = OrderedDict((fp.name, fp.stat().st_size) for fp in files)
+        self._size = sum(self._files.values())
+        self._evict()
+
+    def _filename(self, key: str) -> str:
+        """ return the cache file name for the given request key """
+        digest = hashlib.sha256(f"{_FORMAT_VERSION}:{key}".encode()).hexdigest()
+        return digest + self.FILE_SUFFIX
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """ return the cached records for the request key, or None if not cached """
+        name = self._filename(key)
+        file_p = self.directory / name
+
+        try:
+            data = file_p.read_bytes()
+            os.utime(file_p)
+        except FileNotFoundError:
+            self._discard(name)
+            return None
+
+        # the file may have been written by another process, so the size
+        # accounting is refreshed on each use.
+
+        self._discard(name)
+        self._files[name] = len(data)
+        self._size += len(data)
+        return load_records(data)
+
+    def put(self, key: str, records: List[Dict]):
+        """ store the records for the request key, evicting files as needed """
+        name = self._filename(key)
+        data = dump_records(records)
+
+        if len(data) > self.max_size:
+            return
+
+        # write to a temporary file and then rename so that a concurrent
+        # reader, in another process, never sees a partial file.
+
+        tmp_p = self.directory / f"{name}.{os.getpid()}.tmp"
+        tmp_p.write_bytes(data)
+        os.replace(tmp_p, self.directory / name)
+
+        self._discard(name)
+        self._files[name] = len(data)
+        self._size += len(data)
+        self._evict()
+
+    def clear(self):
+        """ remove all cache files """
+        for name in list(self._files):
+            (self.directory / name).unlink(missing_ok=True)
+            self._discard(name)
+
+    def _discard(self, name: str):
+        """ remove the file from the size accounting """
+        if (size := self._files.pop(name, None)) is not None:
+            self._size -= size
+
+    def _evict(self):
+        """ remove the least recently used files until within max_size """
+        while self._size > self.max_size and self._files:
+            name, size = self._files.popitem(last=False)
+            self._size -= size
+            (self.directory / name).unlink(missing_ok=True)
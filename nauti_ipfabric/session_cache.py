@@ -0,0 +1,135 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Optional, AnyStr
+from pathlib import Path
+import hashlib
+import json
+import time
+import os
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["SessionCache"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class SessionCache(object):
+    """
+    On-disk cache of the IPF client login state, so that short-lived
+    processes using the same IPF system do not each need to login and
+    retrieve the IPF version and snapshot catalog.  The state includes the
+    access and refresh tokens, when logged in with credentials; the file is
+    therefore created readable by the owner only, as is its directory.
+
+    The cache file holds an entry per IPF system and login identity, keyed by
+    a hash so that neither the token nor the user-name are stored as keys.
+    Each entry expires `ttl` seconds after the login that created it; the
+    snapshot catalog is reused for that long, so the ttl also bounds how long
+    a newly loaded snapshot remains unseen.
+    """
+
+    FILE_MODE = 0o600
+    DIR_MODE = 0o700
+
+    def __init__(self, path: AnyStr, ttl: float):
+        """
+        Parameters
+        ----------
+        path:
+            The filesystem path of the cache file; the directory is created if
+            it does not exist.
+
+        ttl: float
+            The number of seconds an entry remains valid.
+        """
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(mode=self.DIR_MODE, parents=True, exist_ok=True)
+        self.ttl = ttl
+
+    @staticmethod
+    def entry_key(base_url: str, identity: str) -> str:
+        """ return the key of the IPF system `base_url` and login `identity` """
+        return hashlib.sha256(f"{base_url}\n{identity}".encode()).hexdigest()
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, entries: Dict[str, Dict]):
+        # write to a temporary file, created with the owner only permissions,
+        # and then rename so that a concurrent reader never sees a partial
+        # file.
+
+        tmp_p = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp_p, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, self.FILE_MODE)
+        with os.fdopen(fd, "w") as ofile:
+            json.dump(entries, ofile)
+
+        os.replace(tmp_p, self.path)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """ return the session state of the key, or None if missing or expired """
+        if (entry := self._read().get(key)) is None:
+            return None
+
+        if entry["expires"] < time.time():
+            self.discard(key)
+            return None
+
+        return entry["state"]
+
+    def put(self, key: str, state: Dict, renew: bool = True):
+        """
+        Store the session state of the key.  When `renew` is False, the entry
+        keeps the expiry of the existing entry, for example when only the
+        access token is refreshed.
+        """
+        entries = self._read()
+        now = time.time()
+
+        # expired entries, of any key, are removed as the file is rewritten.
+
+        entries = {
+            each: entry for each, entry in entries.items() if entry["expires"] >= now
+        }
+
+        if renew or key not in entries:
+            expires = now + self.ttl
+        else:
+            expires = entries[key]["expires"]
+
+        entries[key] = dict(expires=expires, state=state)
+        self._write(entries)
+
+    def discard(self, key: str):
+        """ remove the entry of the key """
+        entries = self._read()
+        if entries.pop(key, None) is not None:
+            self._write(entries)
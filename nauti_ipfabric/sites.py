@@ -17,7 +17,8 @@
 # System Imports
 # -----------------------------------------------------------------------------
 
-from typing import Dict, Optional
+from typing import Dict, Optional, Callable
+from functools import partial
 
 # -----------------------------------------------------------------------------
 # Private Imports
@@ -26,6 +27,7 @@ from typing import Dict, Optional
 from nauti.collection import Collection, CollectionCallback
 from nauti.collections.sites import SiteCollection
 from nauti_ipfabric.source import IPFabricSource
+from nauti_ipfabric.collection import IPFabricCollectionMixin
 
 # -----------------------------------------------------------------------------
 # Exports
@@ -41,19 +43,27 @@ __all__ = ["IPFabricSiteCollection"]
 # -----------------------------------------------------------------------------
 
 
-class IPFabricSiteCollection(Collection, SiteCollection):
+class IPFabricSiteCollection(IPFabricCollectionMixin, Collection, SiteCollection):
 
     name = "sites"
     source_class = IPFabricSource
 
-    async def fetch(self, **filters):
-        ipf = self.source.client
-        self.source_records.extend(
-            await ipf.fetch_table(url="tables/inventory/sites", columns=["siteName"])
+    # other site attributes, for example "devicesCount", can be requested
+    # using the fetch `columns` parameter.
+
+    COLUMNS = ("siteName",)
+
+    ITEMS_FILTER = ("siteName", "eq")
+
+    def _fetcher(self) -> Callable:
+        return partial(
+            self.source.client.fetch_table,
+            url="tables/inventory/sites",
+            columns=list(self.COLUMNS),
         )
 
     def itemize(self, rec: Dict) -> Dict:
-        return {"name": rec["siteName"]}
+        return {"name": self.source.sites[rec["siteName"]]}
 
     async def add_items(
         self, items: Dict, callback: Optional[CollectionCallback] = None
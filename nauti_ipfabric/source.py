@@ -17,22 +17,50 @@
 # System Imports
 # -----------------------------------------------------------------------------
 
-from typing import Optional
+from typing import Optional, Callable, AsyncIterator, List, Dict, Tuple, AnyStr
+from typing import TYPE_CHECKING
+from functools import partial, lru_cache
+from time import perf_counter
+import asyncio
+import json
+import os
+import sys
 
 # -----------------------------------------------------------------------------
 # Public Imports
 # -----------------------------------------------------------------------------
 
-from aioipfabric.client import IPFabricClient
+# the aioipfabric client, and httpx, are imported when the source is created
+# rather than when this module is imported, so that the nauti plugin modules
+# of this package import quickly; see `client_class`.
+
 from nauti.source import Source
 from nauti.config_models import SourcesModel
-from nauti.mappings import create_expander
+from nauti.mappings import create_expander, normalize_hostname
 
 # -----------------------------------------------------------------------------
 # Private Imports
 # -----------------------------------------------------------------------------
 
 from nauti_ipfabric import NAUTI_SOURCE_NAME
+from nauti_ipfabric.device_cache import DeviceCache
+from nauti_ipfabric.response_cache import ResponseCache
+from nauti_ipfabric.session_cache import SessionCache
+from nauti_ipfabric.checkpoint import FetchCheckpoint
+from nauti_ipfabric.interning import InternMap
+from nauti_ipfabric.metrics import MetricsHook
+from nauti_ipfabric.normalizers import load_normalizers
+from nauti_ipfabric.filters import create_filter_compiler, FilterBuilder
+from nauti_ipfabric.decode import load_decoder
+from nauti_ipfabric.throttle import (
+    AdaptiveLimiter,
+    RETRY_STATUS,
+    retry_after,
+    backoff_delay,
+)
+
+if TYPE_CHECKING:
+    from nauti_ipfabric.client import IPFabricClient  # noqa: F401
 
 # -----------------------------------------------------------------------------
 # Exports
@@ -48,10 +76,109 @@ __all__ = ["IPFabricSource", "IPFabricClient"]
 # -----------------------------------------------------------------------------
 
 
+class _ClientClass(object):
+    """ descriptor that imports the IPF client class on first use """
+
+    def __get__(self, instance, owner):
+        from nauti_ipfabric.client import IPFabricClient
+
+        return IPFabricClient
+
+
+def __getattr__(name):
+    # IPFabricClient remains importable from this module, on demand.
+    if name == "IPFabricClient":
+        return _ClientClass().__get__(None, None)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class IPFabricSource(Source):
 
     name = NAUTI_SOURCE_NAME
-    client_class = IPFabricClient
+    client_class = _ClientClass()
+
+    # default number of records requested per API call when paginating
+    # through a table; can be set by the source option "PAGE_SIZE".
+
+    PAGE_SIZE = 1_000
+
+    # default number of seconds the shared device cache entries remain valid;
+    # can be set by the source option "DEVICE_CACHE_TTL".
+
+    DEVICE_CACHE_TTL = 300
+
+    # default number of filter values, for example hostnames, grouped into a
+    # single request when a fetch is batched; can be set by the source option
+    # "BATCH_SIZE".
+
+    BATCH_SIZE = 50
+
+    # default number of concurrent requests when a fetch is split into many
+    # requests; can be set by the source option "FETCH_CONCURRENCY".
+
+    FETCH_CONCURRENCY = 10
+
+    # default maximum number of bytes used by the on-disk response cache.  The
+    # cache is only used when the source option "RESPONSE_CACHE_DIR" is set;
+    # the size can be set by the source option "RESPONSE_CACHE_SIZE".
+
+    RESPONSE_CACHE_SIZE = 1 << 30
+
+    # default maximum number of values memoized by each of the expanders and
+    # deflaters; can be set by the source option "EXPANDER_CACHE_SIZE".
+
+    EXPANDER_CACHE_SIZE = 16_384
+
+    # when the source option "COMPACT_RECORDS" is set to true, the collections
+    # store the source records and items as CompactRecord rather than dict;
+    # reducing memory for large collections.
+
+    COMPACT_RECORDS = False
+
+    # default maximum number of concurrent table requests.  The source starts
+    # at FETCH_CONCURRENCY requests and adapts the limit, up to this maximum,
+    # to the IPF server overload responses; can be set by the source option
+    # "MAX_CONCURRENT_REQUESTS".
+
+    MAX_CONCURRENT_REQUESTS = 20
+
+    # default number of times a table request is retried after an overload
+    # response (429, 502, 503, 504) or timeout, and the backoff seconds before
+    # the first retry, doubled on each retry up to RETRY_BACKOFF_MAX; can be
+    # set by the source options of the same names.  A Retry-After response
+    # header takes precedence over the backoff.
+
+    RETRY_LIMIT = 5
+    RETRY_BACKOFF = 0.5
+    RETRY_BACKOFF_MAX = 30.0
+
+    # default number of worker processes used by the collections
+    # `make_keys_parallel`, and the number of records sent to a worker at a
+    # time; can be set by the source options "ITEMIZE_PROCESSES" and
+    # "ITEMIZE_CHUNK_SIZE".  When 0, the records are itemized in-process.
+
+    ITEMIZE_PROCESSES = 0
+    ITEMIZE_CHUNK_SIZE = 10_000
+
+    # default maximum number of filter expressions memoized by the compiled
+    # filter cache; can be set by the source option "FILTER_CACHE_SIZE".
+
+    FILTER_CACHE_SIZE = 1_024
+
+    # the Accept-Encoding request header, so that the IPF server compresses
+    # the table responses; can be set by the source option "ACCEPT_ENCODING".
+    # When None, the httpx default is used, which includes gzip and deflate,
+    # and brotli or zstd when the httpx decoders for those are installed.
+
+    ACCEPT_ENCODING = None
+
+    # default number of seconds a login session is reused from the session
+    # cache.  The cache is only used when the source option
+    # "SESSION_CACHE_FILE" is set; the ttl can be set by the source option
+    # "SESSION_CACHE_TTL".
+
+    SESSION_CACHE_TTL = 600
 
     def __init__(self, config: Optional[SourcesModel] = None, **kwargs):
         super(IPFabricSource, self).__init__()
@@ -69,25 +196,524 @@ class IPFabricSource(Source):
             )
             initargs.update(kwargs)
 
-        if (expands := getattr(self.config, "expands", None)) is not None:
-            items = expands.items()
-            self.expands = {field: create_expander(mapping) for field, mapping in items}
+        # options specific to the source are removed from the options before
+        # they are passed to the IPF client.
+
+        clientopts = initargs or dict(kwargs)
 
-            self.deflates = {
-                field: create_expander(mapping.inv) for field, mapping in items
+        # `expander_config` retains the expands mappings, and cache size, so
+        # that the expanders can be created in the itemize worker processes.
+
+        self.expander_config = (
+            dict(getattr(self.config, "expands", None) or {}),
+            clientopts.pop("EXPANDER_CACHE_SIZE", self.EXPANDER_CACHE_SIZE),
+        )
+        self.expands, self.deflates = create_expanders(*self.expander_config)
+
+        # `hostnames` and `sites` map the IPF hostname and site name values to
+        # their interned canonical form; shared by the collections itemize.
+        # Interface names are memoized, and interned, by the expanders.
+
+        self.hostnames = InternMap(normalize_hostname)
+        self.sites = InternMap()
+
+        self.page_size = clientopts.pop("PAGE_SIZE", self.PAGE_SIZE)
+        self.batch_size = clientopts.pop("BATCH_SIZE", self.BATCH_SIZE)
+        self.concurrency = clientopts.pop("FETCH_CONCURRENCY", self.FETCH_CONCURRENCY)
+        self.compact_records = clientopts.pop("COMPACT_RECORDS", self.COMPACT_RECORDS)
+        self.itemize_processes = clientopts.pop(
+            "ITEMIZE_PROCESSES", self.ITEMIZE_PROCESSES
+        )
+        self.itemize_chunk_size = clientopts.pop(
+            "ITEMIZE_CHUNK_SIZE", self.ITEMIZE_CHUNK_SIZE
+        )
+
+        # `if_normalizers` are the interface name normalizers keyed by os_name,
+        # see nauti_ipfabric.normalizers; `normalizer_config` retains the
+        # "INTERFACE_NORMALIZERS" option for the itemize worker processes.
+
+        self.normalizer_config = clientopts.pop("INTERFACE_NORMALIZERS", None) or {}
+        self.if_normalizers = load_normalizers(self.normalizer_config)
+        self.retry_limit = clientopts.pop("RETRY_LIMIT", self.RETRY_LIMIT)
+        self.retry_backoff = clientopts.pop("RETRY_BACKOFF", self.RETRY_BACKOFF)
+        self.retry_backoff_max = clientopts.pop(
+            "RETRY_BACKOFF_MAX", self.RETRY_BACKOFF_MAX
+        )
+
+        # `compile_filter` returns the IPF filter of a filter expression
+        # string, memoized so that the expressions used repeatedly by the
+        # collections are parsed once.
+
+        self.compile_filter = create_filter_compiler(
+            clientopts.pop("FILTER_CACHE_SIZE", self.FILTER_CACHE_SIZE)
+        )
+
+        # `json_decoder` decodes the table response bodies; the fastest JSON
+        # decoder installed unless selected by the source option
+        # "JSON_DECODER", see nauti_ipfabric.decode.
+
+        self.json_decoder = load_decoder(clientopts.pop("JSON_DECODER", None))
+
+        if accept_encoding := clientopts.pop("ACCEPT_ENCODING", self.ACCEPT_ENCODING):
+            clientopts["headers"] = {
+                **clientopts.get("headers", {}),
+                "Accept-Encoding": accept_encoding,
             }
-        else:
-            self.expands = {}
-            self.deflates = {}
 
-        self.client = IPFabricClient(**(initargs or kwargs))
+        self.limiter = AdaptiveLimiter(
+            initial=self.concurrency,
+            maximum=clientopts.pop(
+                "MAX_CONCURRENT_REQUESTS", self.MAX_CONCURRENT_REQUESTS
+            ),
+        )
+
+        # `_inflight` maps the request key of each table request in progress
+        # to the shared fetch awaited by the callers making that request.
+
+        self._inflight: Dict[str, _SharedFetch] = dict()
+
+        # `device_cache` is shared by the collections that require device
+        # attributes, such as os_name, so that the devices table is fetched
+        # once rather than by each collection.
+
+        self.device_cache = DeviceCache(
+            source=self, ttl=clientopts.pop("DEVICE_CACHE_TTL", self.DEVICE_CACHE_TTL)
+        )
+
+        # `response_cache` is the optional on-disk cache of table responses,
+        # keyed by the snapshot so that repeated runs against the same
+        # snapshot do not need to fetch the same data from the IPF system.
+
+        cache_dir = clientopts.pop("RESPONSE_CACHE_DIR", None)
+        cache_size = clientopts.pop("RESPONSE_CACHE_SIZE", self.RESPONSE_CACHE_SIZE)
+
+        self.response_cache = (
+            ResponseCache(directory=cache_dir, max_size=cache_size)
+            if cache_dir
+            else None
+        )
+
+        # `session_cache` is the optional on-disk cache of the client login
+        # state, shared by the processes using the same IPF system and login
+        # identity, so that each process does not need to login.
+
+        session_file = clientopts.pop("SESSION_CACHE_FILE", None)
+        session_ttl = clientopts.pop("SESSION_CACHE_TTL", self.SESSION_CACHE_TTL)
+
+        self.session_cache = (
+            SessionCache(path=session_file, ttl=session_ttl) if session_file else None
+        )
+        self._session_key = SessionCache.entry_key(
+            base_url=clientopts.get("base_url") or os.getenv("IPF_ADDR", ""),
+            identity=(
+                clientopts.get("token")
+                or clientopts.get("username")
+                or os.getenv("IPF_TOKEN")
+                or os.getenv("IPF_USERNAME", "")
+            ),
+        )
+
+        # `metrics` is the instrumentation hook; the measurements are only
+        # taken when a callback is subscribed.
+
+        self.metrics = MetricsHook()
+
+        # the client session refreshes an expired access token, and the
+        # refreshed login state is stored into the session cache.
+
+        self.client = self.client_class(
+            on_refresh=lambda relogin: self._save_session(renew=relogin),
+            **clientopts,
+        )
+
+    def expander_stats(self) -> Dict[str, Dict]:
+        """
+        Return the memoization statistics (hits, misses, maxsize, currsize) of
+        each expander and deflater, keyed by "expands.<field>" and
+        "deflates.<field>".
+        """
+        return {
+            f"{kind}.{field}": func.cache_info()._asdict()
+            for kind, funcs in (("expands", self.expands), ("deflates", self.deflates))
+            for field, func in funcs.items()
+        }
+
+    def filter(self, *exprs: str) -> FilterBuilder:
+        """
+        Return a filter builder of the compiled filter expressions, for
+        example:
+
+            source.filter("siteName = atl").any("hostname", names).build()
+        """
+        return FilterBuilder(*map(self.compile_filter, exprs))
 
     async def login(self, *vargs, **kwargs):
+        # the login state is restored from the session cache, when enabled,
+        # rather than logging in.
+
+        if self.session_cache and (state := self.session_cache.get(self._session_key)):
+            self.client.restore_session(state)
+            return
+
         await self.client.login()
+        self._save_session()
 
     async def logout(self):
         await self.client.logout()
 
+    def _save_session(self, renew: bool = True):
+        """
+        Store the client login state into the session cache, if enabled.  When
+        `renew` is False, for example after the access token is refreshed, the
+        cache entry retains its expiry.
+        """
+        if self.session_cache:
+            self.session_cache.put(
+                self._session_key, self.client.session_state(), renew=renew
+            )
+
+    async def fetch_records(self, fetcher: Callable, **params) -> List[Dict]:
+        """
+        Coroutine used by the collections to fetch table records, so that all
+        table requests made via this source are handled in one place.
+
+        An identical request made while one is in progress, for example by
+        two collections fetched concurrently, does not make another API call
+        but receives a copy of the records of the request in progress.  The
+        request is cancelled only when all of its callers are cancelled.  When
+        the response cache is enabled, the records are served from the cache
+        when available; otherwise fetched and then stored into the cache.
+
+        Parameters
+        ----------
+        fetcher:
+            The IPF client table coroutine, for example `client.fetch_table`
+            or a partial of it with the `url` and `columns`.
+
+        Other Parameters
+        ----------------
+        The `params` are passed as-is to the `fetcher`.
+
+        Returns
+        -------
+        List of table records.
+        """
+        key = self._request_key(fetcher, params)
+
+        if (shared := self._inflight.get(key)) is None:
+            task = asyncio.ensure_future(self._fetch_cached(fetcher, key, params))
+            shared = self._inflight[key] = _SharedFetch(task)
+            task.add_done_callback(lambda _: self._discard_inflight(key, shared))
+
+        # the fetch runs in its own task, shielded from the cancellation of
+        # any one caller; it is cancelled only when all callers are.
+
+        shared.callers += 1
+
+        try:
+            records = await asyncio.shield(shared.task)
+
+        except asyncio.CancelledError:
+            shared.callers -= 1
+            if not shared.callers and not shared.task.done():
+                self._discard_inflight(key, shared)
+                shared.task.cancel()
+            raise
+
+        except BaseException:
+            shared.callers -= 1
+            raise
+
+        # each caller, other than the last, receives its own copy of the
+        # records, since a collection may transform the records in place.
+
+        shared.callers -= 1
+        return records if not shared.callers else [dict(rec) for rec in records]
+
+    def _discard_inflight(self, key: str, shared: "_SharedFetch"):
+        """ remove the shared fetch so that later requests make a new fetch """
+        if self._inflight.get(key) is shared:
+            del self._inflight[key]
+
+    async def _fetch_cached(
+        self, fetcher: Callable, key: str, params: Dict
+    ) -> List[Dict]:
+        """ return the records from the response cache, if enabled, or fetch """
+        if self.response_cache is None:
+            return await self._fetch(fetcher, params)
+
+        if (records := self.response_cache.get(key)) is not None:
+            if self.metrics:
+                self.metrics.emit(
+                    "request",
+                    table=_table_name(fetcher),
+                    seconds=0.0,
+                    decode_seconds=0.0,
+                    bytes=0,
+                    wire_bytes=0,
+                    rows=len(records),
+                    cached=True,
+                )
+            return records
+
+        records = await self._fetch(fetcher, params)
+        self.response_cache.put(key, records)
+        return records
+
+    async def _fetch(self, fetcher: Callable, params: Dict) -> List[Dict]:
+        """
+        Make the table request and return the records.  The request is made
+        within a slot of the adaptive limiter, and is retried after an
+        overload response or timeout; an expired access token is refreshed by
+        the client session, see nauti_ipfabric.client.  The raw response is
+        requested, rather than the records, so that the body is decoded by the
+        `json_decoder` and the response size and the decode time can be
+        measured.
+        """
+        from httpx import TimeoutException
+
+        table = _table_name(fetcher)
+        attempt = 0
+
+        while True:
+            attempt += 1
+            start = perf_counter()
+
+            async with self.limiter.slot() as slot:
+                try:
+                    res = await fetcher(return_as="raw", **params)
+                    status = res.status_code
+                except TimeoutException:
+                    if attempt > self.retry_limit:
+                        raise
+                    res, status = None, "timeout"
+
+                slot.failed = res is None or status in RETRY_STATUS
+
+            if not slot.failed or attempt > self.retry_limit:
+                break
+
+            if res is None or (delay := retry_after(res)) is None:
+                delay = backoff_delay(
+                    attempt, self.retry_backoff, self.retry_backoff_max
+                )
+
+            if self.metrics:
+                self.metrics.emit("retry", table=table, status=status, delay=delay)
+
+            await asyncio.sleep(delay)
+
+        res.raise_for_status()
+
+        if not self.metrics:
+            return self.json_decoder(res.content)["data"]
+
+        received = perf_counter()
+        records = self.json_decoder(res.content)["data"]
+
+        self.metrics.emit(
+            "request",
+            table=table,
+            seconds=received - start,
+            decode_seconds=perf_counter() - received,
+            bytes=len(res.content),
+            wire_bytes=int(res.headers.get("Content-Length", res.num_bytes_downloaded)),
+            rows=len(records),
+            cached=False,
+        )
+        return records
+
+    def _request_key(self, fetcher: Callable, params: Dict) -> str:
+        """
+        Return the string that uniquely identifies the table request; composed
+        of the active snapshot, the fetcher name and all of the parameters,
+        including those bound by a partial, for example the url and columns.
+        """
+        func, bound = _unwrap(fetcher)
+
+        return json.dumps(
+            [self.client.active_snapshot, func.__name__, {**bound, **params}],
+            sort_keys=True,
+            default=str,
+        )
+
+    async def paginate(
+        self,
+        fetcher: Callable,
+        page_size: Optional[int] = None,
+        start: int = 0,
+        **params,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Async generator used to retrieve table records one page at a time
+        rather than the entire table in a single API call.  Only the current
+        page of records is held by this generator, so that the Caller can
+        process each page as it arrives.
+
+        Parameters
+        ----------
+        fetcher:
+            The IPF client table coroutine, for example `client.fetch_table`
+            or `client.fetch_devices`, decorated by aioipfabric `table_api`.
+
+        page_size: int
+            The number of records per page; if not provided the source
+            `page_size` is used.
+
+        start: int
+            The table offset of the first record; used to resume a fetch.
+
+        Other Parameters
+        ----------------
+        Any other `params` are passed as-is to the `fetcher`, for example
+        the `url`, `columns` and `filters`.
+
+        Yields
+        ------
+        List of table records, one page at a time.
+        """
+        limit = page_size or self.page_size
+        page_num = 0
+
+        while True:
+            page = await self.fetch_records(
+                fetcher, pagination=dict(start=start, limit=limit), **params
+            )
+            page_num += 1
+
+            if self.metrics:
+                self.metrics.emit(
+                    "page", table=_table_name(fetcher), page=page_num, rows=len(page)
+                )
+
+            if page:
+                yield page
+
+            # the final page is the one that returned fewer records than
+            # requested; there is no need to make another request.
+
+            if len(page) < limit:
+                break
+
+            start += limit
+
+    async def fetch_checkpointed(
+        self,
+        fetcher: Callable,
+        directory: AnyStr,
+        page_size: Optional[int] = None,
+        time_budget: Optional[float] = None,
+        **params,
+    ) -> Optional[List[Dict]]:
+        """
+        Paginated fetch of the table records that commits each page to the
+        checkpoint `directory` as it arrives, see nauti_ipfabric.checkpoint.
+        When the directory holds the progress of the same request, the fetch
+        resumes from the last committed page.  A fetch interrupted by an
+        error or cancellation can therefore be resumed by calling again.
+
+        Parameters
+        ----------
+        fetcher:
+            The IPF client table coroutine, as used by `paginate`.
+
+        directory:
+            The checkpoint directory of this request.
+
+        page_size: int
+            The number of records per page; if not provided the source
+            `page_size` is used.
+
+        time_budget: float
+            The number of seconds after which no further page is requested;
+            a page request in progress is completed and committed.
+
+        Other Parameters
+        ----------------
+        Any other `params` are passed as-is to the `fetcher`.
+
+        Returns
+        -------
+        The records of the table once all pages are committed; or None when
+        the time budget expired first.
+        """
+        limit = page_size or self.page_size
+        deadline = perf_counter() + time_budget if time_budget else None
+
+        checkpoint = FetchCheckpoint(directory)
+        checkpoint.begin(
+            snapshot=self.client.active_snapshot,
+            table=_table_name(fetcher),
+            filters=params.get("filters"),
+            request=self._request_key(fetcher, params),
+        )
+
+        if not checkpoint.complete:
+            async for page in self.paginate(
+                fetcher, page_size=limit, start=checkpoint.offset, **params
+            ):
+                checkpoint.commit(page)
+                if deadline and perf_counter() >= deadline:
+                    return None
+
+            checkpoint.commit([], final=True)
+
+        return [rec for page in checkpoint.pages() for rec in page]
+
     @property
     def is_connected(self):
         return not self.client.api.is_closed
+
+
+class _SharedFetch(object):
+    """ the task of a table request, and the number of callers awaiting it """
+
+    __slots__ = ("task", "callers")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.callers = 0
+
+
+def create_expanders(
+    mappings: Dict, maxsize: Optional[int]
+) -> Tuple[Dict[str, Callable], Dict[str, Callable]]:
+    """
+    Return the expanders and deflaters of the expands `mappings`, keyed by
+    field name.  The expanders are called for every record itemized, while the
+    number of distinct values, e.g. interface names, is small; so each
+    expander is memoized, up to `maxsize` values.  The memoized values are
+    interned so that the items of all collections share one string object per
+    distinct value.
+    """
+
+    def memoize(expander: Callable) -> Callable:
+        def interned(value):
+            found = expander(value)
+            return sys.intern(found) if isinstance(found, str) else found
+
+        return lru_cache(maxsize=maxsize)(interned)
+
+    items = mappings.items()
+
+    expands = {field: memoize(create_expander(mapping)) for field, mapping in items}
+    deflates = {
+        field: memoize(create_expander(mapping.inv)) for field, mapping in items
+    }
+    return expands, deflates
+
+
+def _unwrap(fetcher: Callable) -> Tuple[Callable, Dict]:
+    """ return the fetcher function and the keywords bound by any partials """
+    bound = dict()
+    while isinstance(fetcher, partial):
+        bound = {**fetcher.keywords, **bound}
+        fetcher = fetcher.func
+
+    return fetcher, bound
+
+
+def _table_name(fetcher: Callable) -> str:
+    """ return the table name used by the metrics, the url or fetcher name """
+    func, bound = _unwrap(fetcher)
+    return bound["url"].strip("/") if "url" in bound else func.__name__
@@ -0,0 +1,168 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Optional, TYPE_CHECKING
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import asyncio
+import random
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+if TYPE_CHECKING:
+    import httpx
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["AdaptiveLimiter", "RETRY_STATUS", "retry_after", "backoff_delay"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# the response status codes that indicate the IPF server is overloaded or
+# temporarily unavailable, and so the request should be retried.
+
+RETRY_STATUS = frozenset({429, 502, 503, 504})
+
+
+class AdaptiveLimiter(object):
+    """
+    Concurrency limiter whose limit adapts to the IPF server, using additive
+    increase and multiplicative decrease (AIMD).  Each request that succeeds
+    increases the limit by one request per "window" of requests, up to
+    `maximum`.  A request that fails with an overload response or timeout
+    halves the limit; never below `minimum`.
+
+    The request latency is not used to adjust the limit, since it varies
+    with the table and page size requested rather than only with the server
+    load.
+
+    Examples
+    --------
+        async with limiter.slot() as slot:
+            res = await fetcher(...)
+            slot.failed = res.status_code in RETRY_STATUS
+    """
+
+    ERROR_DECREASE = 0.5
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.active = 0
+
+        # the condition is created on first use so that it is bound to the
+        # running event loop rather than the one current when the source was
+        # created.
+
+        self._cond: Optional[asyncio.Condition] = None
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Context manager that waits for, and holds, one of the request slots.
+        The yielded slot `failed` attribute is set by the Caller when the
+        request fails due to server load; an httpx timeout or network error
+        raised within the context is also counted as a failure.  Any other
+        exception, for example a programming error, does not change the
+        limit.
+        """
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+        slot = _Slot()
+
+        try:
+            yield slot
+        except Exception as exc:
+            # httpx is imported by the client making the request; it is not
+            # imported with this module, see nauti_ipfabric.source.
+
+            from httpx import TimeoutException, NetworkError
+
+            if isinstance(exc, (TimeoutException, NetworkError)):
+                slot.failed = True
+            raise
+        finally:
+            self._adjust(slot.failed)
+            async with self._cond:
+                self.active -= 1
+                self._cond.notify_all()
+
+    def _adjust(self, failed: bool):
+        """ update the limit based on the outcome of a request """
+        if failed:
+            self.limit = max(self.minimum, self.limit * self.ERROR_DECREASE)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+class _Slot(object):
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+
+def retry_after(res: "httpx.Response") -> Optional[float]:
+    """
+    Return the number of seconds to wait as given by the response Retry-After
+    header, which is either a number of seconds or an HTTP date; or None if
+    the header is not present or not valid.
+    """
+    if (value := res.headers.get("Retry-After")) is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    from email.utils import parsedate_to_datetime
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """
+    Return the exponential backoff delay for the retry attempt, starting at 1,
+    with full jitter so that concurrent requests do not retry in lockstep.
+    """
+    return random.uniform(0, min(maximum, base * 2 ** (attempt - 1)))
@@ -16,7 +16,6 @@
 
 
 from setuptools import setup, find_packages
-from pathlib import Path
 
 package_name = "nauti-ipfabric"
 package_version = open("VERSION").read().strip()
@@ -29,6 +28,11 @@ def requirements(filename="requirements.txt"):
 with open("README.md", "r") as fh:
     long_description = fh.read()
 
+# only the source and collection modules are registered as nauti plugins; the
+# other modules of the package are imported by these as needed.
+
+PLUGIN_MODULES = ["source", "devices", "sites", "interfaces", "ipaddrs", "portchans"]
+
 
 # -----------------------------------------------------------------------------
 #
@@ -46,11 +50,9 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=requirements(),
+    extras_require={"arrow": ["pyarrow"], "fast": ["msgspec"]},
     entry_points={
-        "nauti.plugins": [
-            f"{fp.stem} = {fp.parent}.{fp.stem}"
-            for fp in Path("nauti_ipfabric").glob("[!_]*.py")
-        ]
+        "nauti.plugins": [f"{name} = nauti_ipfabric.{name}" for name in PLUGIN_MODULES]
     },
     classifiers=[
         "Development Status :: 3 - Alpha",
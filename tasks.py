@@ -48,6 +48,12 @@ def precheck(ctx):
     ctx.run("interrogate -c pyproject.toml", pty=True)
 
 
+@task
+def importtime(ctx, budget=100):
+    """ check the nauti plugin modules import within the budget milliseconds """
+    ctx.run(f"python benchmarks/bench_import.py --budget {budget}")
+
+
 @task
 def clean(ctx):
     ctx.run("python setup.py clean")
@@ -0,0 +1,140 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Test fixtures.  The IPFabricSource is created with an httpx transport that
+serves the synthetic tables of the benchmarks MockIPFabric, so that the
+tests do not need an IP Fabric system.  The nauti collection registry and
+hostname normalization, which are driven by the nauti configuration file,
+are replaced by the equivalents below.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+from types import SimpleNamespace
+import json
+import sys
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import pytest
+import pytest_asyncio
+from bidict import bidict
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from nauti_ipfabric import source as source_module
+from nauti_ipfabric import collection, device_cache, orchestrator
+from nauti_ipfabric.source import IPFabricSource
+from nauti_ipfabric.devices import IPFabricDeviceCollection
+from nauti_ipfabric.interfaces import IPFabricInterfaceCollection
+from nauti_ipfabric.ipaddrs import IPFabricIPAddrCollection
+from nauti_ipfabric.portchans import IPFabricPortChannelCollection
+from nauti_ipfabric.sites import IPFabricSiteCollection
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "benchmarks"))
+
+from mock_ipf import MockIPFabric  # noqa: E402
+
+# -----------------------------------------------------------------------------
+#
+#                              CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+COLLECTIONS = {
+    "devices": IPFabricDeviceCollection,
+    "interfaces": IPFabricInterfaceCollection,
+    "ipaddrs": IPFabricIPAddrCollection,
+    "portchans": IPFabricPortChannelCollection,
+    "sites": IPFabricSiteCollection,
+}
+
+INTERFACE_EXPANDS = bidict({"Et": "Ethernet", "Po": "Port-Channel"})
+
+
+def get_collection(source, name):
+    return COLLECTIONS[name](source=source)
+
+
+def normalize_hostname(hostname):
+    return hostname.lower().split(".", 1)[0]
+
+
+class RecordingIPFabric(MockIPFabric):
+    """ MockIPFabric that retains the path and body of each table request """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bodies = list()
+
+    async def __call__(self, request):
+        if request.method == "POST" and "/tables/" in request.url.path:
+            path = "/tables/" + request.url.path.split("/tables/", 1)[-1]
+            self.bodies.append((path, json.loads(request.content)))
+
+        return await super().__call__(request)
+
+
+@pytest.fixture(autouse=True)
+def nauti_registry(monkeypatch):
+    for module in (collection, device_cache, orchestrator):
+        monkeypatch.setattr(module, "get_collection", get_collection)
+
+    monkeypatch.setattr(source_module, "normalize_hostname", normalize_hostname)
+
+
+@pytest.fixture()
+def mock_ipf():
+    return RecordingIPFabric(devices=20, interfaces=4, portchans=1, sites=4)
+
+
+@pytest.fixture()
+def make_source(mock_ipf):
+    """
+    return a function that creates a source, with options, using the mock; or
+    using the given `mock` IPF system.
+    """
+
+    def _make_source(mock=None, **options):
+        config = SimpleNamespace(
+            expands=dict(interface=INTERFACE_EXPANDS),
+            default=SimpleNamespace(
+                url="https://ipf.mock",
+                credentials=SimpleNamespace(
+                    token=SimpleNamespace(get_secret_value=lambda: "token")
+                ),
+                options=options,
+            ),
+        )
+        return IPFabricSource(config, transport=(mock or mock_ipf).transport())
+
+    return _make_source
+
+
+@pytest_asyncio.fixture()
+async def source(make_source):
+    """ the logged in source, with the default options """
+    src = make_source()
+    await src.login()
+    yield src
+    await src.logout()
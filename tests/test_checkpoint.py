@@ -0,0 +1,95 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from nauti_ipfabric.checkpoint import FetchCheckpoint
+
+from conftest import COLLECTIONS
+
+
+def page_starts(mock_ipf):
+    return [body["pagination"]["start"] for _, body in mock_ipf.bodies]
+
+
+@pytest.mark.asyncio
+async def test_fetch_checkpointed_resume(source, mock_ipf, tmp_path):
+    directory = tmp_path / "devices"
+
+    # a time budget that expires after the first page.
+
+    col = COLLECTIONS["devices"](source=source)
+    assert not await col.fetch_checkpointed(directory, page_size=7, time_budget=1e-9)
+    assert not col.source_records
+    assert page_starts(mock_ipf) == [0]
+
+    # the fetch resumes from the committed page.
+
+    mock_ipf.bodies.clear()
+    col = COLLECTIONS["devices"](source=source)
+    assert await col.fetch_checkpointed(directory, page_size=7)
+    assert page_starts(mock_ipf) == [7, 14]
+
+    expected = COLLECTIONS["devices"](source=source)
+    await expected.fetch()
+    assert col.source_records == expected.source_records
+
+    # the completed checkpoint is used without any request.
+
+    mock_ipf.bodies.clear()
+    col = COLLECTIONS["devices"](source=source)
+    assert await col.fetch_checkpointed(directory, page_size=7)
+    assert len(col.source_records) == mock_ipf.n_devices
+    assert not mock_ipf.bodies
+
+
+@pytest.mark.asyncio
+async def test_fetch_checkpointed_other_request(source, mock_ipf, tmp_path):
+    directory = tmp_path / "devices"
+    col = COLLECTIONS["devices"](source=source)
+    assert await col.fetch_checkpointed(directory, page_size=7)
+
+    # a different request clears the checkpoint of the prior request.
+
+    mock_ipf.bodies.clear()
+    col = COLLECTIONS["devices"](source=source)
+    site_filter = {"siteName": ["eq", "site0001"]}
+    assert await col.fetch_checkpointed(directory, page_size=7, filters=site_filter)
+
+    assert page_starts(mock_ipf) == [0]
+    assert {rec["siteName"] for rec in col.source_records} == {"site0001"}
+    assert len(list(directory.glob("page-*"))) == 1
+
+
+def test_checkpoint_commit(tmp_path):
+    checkpoint = FetchCheckpoint(tmp_path)
+    assert not checkpoint.begin("snap", "table", None, request="req")
+
+    checkpoint.commit([dict(a=1), dict(a=2)])
+    checkpoint.commit([dict(a=3)])
+
+    resumed = FetchCheckpoint(tmp_path)
+    assert resumed.begin("snap", "table", None, request="req")
+    assert resumed.offset == 3 and not resumed.complete
+
+    resumed.commit([], final=True)
+    assert [rec for page in resumed.pages() for rec in page] == [
+        dict(a=1),
+        dict(a=2),
+        dict(a=3),
+    ]
+
+    resumed.clear()
+    assert not list(tmp_path.iterdir())
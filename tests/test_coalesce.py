@@ -0,0 +1,110 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from functools import partial
+import asyncio
+
+import httpx
+import pytest
+
+
+def sites_fetcher(source):
+    return partial(
+        source.client.fetch_table, url="/tables/inventory/sites", columns=["siteName"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_coalesce(source, mock_ipf):
+    mock_ipf.latency = 0.01
+    fetcher = sites_fetcher(source)
+
+    first, second = await asyncio.gather(
+        source.fetch_records(fetcher), source.fetch_records(fetcher)
+    )
+
+    assert len(mock_ipf.bodies) == 1
+    assert first == second
+    assert first is not second
+    assert all(a is not b for a, b in zip(first, second))
+    assert not source._inflight
+
+
+@pytest.mark.asyncio
+async def test_different_requests_do_not_coalesce(source, mock_ipf):
+    fetcher = sites_fetcher(source)
+
+    await asyncio.gather(
+        source.fetch_records(fetcher),
+        source.fetch_records(fetcher, filters={"siteName": ["eq", "site0001"]}),
+    )
+    assert len(mock_ipf.bodies) == 2
+
+
+@pytest.mark.asyncio
+async def test_originator_cancel_does_not_cancel_waiters(source, mock_ipf):
+    mock_ipf.latency = 0.05
+    fetcher = sites_fetcher(source)
+
+    originator = asyncio.ensure_future(source.fetch_records(fetcher))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.ensure_future(source.fetch_records(fetcher))
+    await asyncio.sleep(0.01)
+
+    originator.cancel()
+    records = await waiter
+
+    assert originator.cancelled()
+    assert len(records) == mock_ipf.n_sites
+    assert len(mock_ipf.bodies) == 1
+
+
+@pytest.mark.asyncio
+async def test_all_callers_cancelled_cancels_request(source, mock_ipf):
+    mock_ipf.latency = 0.05
+    fetcher = sites_fetcher(source)
+
+    callers = [asyncio.ensure_future(source.fetch_records(fetcher)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    shared = next(iter(source._inflight.values()))
+
+    for caller in callers:
+        caller.cancel()
+
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert shared.task.cancelled()
+    assert not source._inflight
+
+    # a later identical request is made anew.
+
+    assert len(await source.fetch_records(fetcher)) == mock_ipf.n_sites
+    assert len(mock_ipf.bodies) == 2
+
+
+@pytest.mark.asyncio
+async def test_request_error_raised_to_all_callers(source, mock_ipf):
+    mock_ipf.latency = 0.01
+    fetcher = partial(source.client.fetch_table, url="/tables/no/such", columns=["x"])
+
+    results = await asyncio.gather(
+        source.fetch_records(fetcher),
+        source.fetch_records(fetcher),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(res, httpx.HTTPStatusError) for res in results)
+    assert not source._inflight
@@ -0,0 +1,75 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from conftest import COLLECTIONS
+
+TABLES = {
+    "devices": "/tables/inventory/devices",
+    "interfaces": "/tables/inventory/interfaces",
+    "ipaddrs": "/tables/addressing/managed-devs",
+    "portchans": "/tables/interfaces/port-channel/member-status",
+    "sites": "/tables/inventory/sites",
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", COLLECTIONS)
+async def test_fetch_requests_columns(source, mock_ipf, name):
+    col = COLLECTIONS[name](source=source)
+    await col.fetch()
+
+    path, body = mock_ipf.bodies[-1]
+    assert path == TABLES[name]
+    assert body["columns"] == list(col.COLUMNS)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", COLLECTIONS)
+async def test_itemize_columns_only(source, mock_ipf, name):
+    """ each collection itemizes a table record restricted to its COLUMNS """
+    col = COLLECTIONS[name](source=source)
+    col._fetcher()
+    await col._prepare_fetch(dict())
+
+    rec = next(iter(mock_ipf.table_rows(TABLES[name])))
+    rec = {column: rec[column] for column in col.COLUMNS}
+
+    for each in col._xf_records([rec]):
+        item = col.itemize(each)
+        assert item is not None
+        assert set(col.KEY_FIELDS) <= set(item)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", COLLECTIONS)
+async def test_fetch_make_keys(source, name):
+    col = COLLECTIONS[name](source=source)
+    await col.fetch()
+    col.make_keys()
+
+    assert col.items
+    assert len(col.items) == len(col.source_records)
+
+
+@pytest.mark.asyncio
+async def test_fetch_extra_columns(source, mock_ipf):
+    col = COLLECTIONS["sites"](source=source)
+    await col.fetch(columns=["devicesCount", "siteName"])
+
+    _, body = mock_ipf.bodies[-1]
+    assert body["columns"] == ["siteName", "devicesCount"]
+    assert all("devicesCount" in rec for rec in col.source_records)
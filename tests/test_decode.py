@@ -0,0 +1,91 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import sys
+
+import pytest
+
+from nauti_ipfabric.decode import DECODERS, load_decoder, available_decoders
+
+from conftest import COLLECTIONS
+
+BODY = json.dumps(
+    dict(data=[dict(hostname="sw1", uptime=10, primaryIp=None, ratio=0.5)], _meta={})
+).encode()
+
+
+def block_decoder(monkeypatch, name):
+    """ make the decoder module `name` fail to import """
+    mod_name = DECODERS[name][0]
+    monkeypatch.setitem(sys.modules, mod_name, None)
+    monkeypatch.setitem(sys.modules, mod_name.split(".")[0], None)
+
+
+def test_decoder_fallback_order(monkeypatch):
+    # each decoder is forced in turn by blocking those before it, and all
+    # decode the response body the same way.
+
+    decoded = dict()
+    names = list(DECODERS)
+
+    for index, name in enumerate(names):
+        with monkeypatch.context() as mp:
+            for blocked in names[:index]:
+                block_decoder(mp, blocked)
+
+            if name not in available_decoders():
+                continue
+
+            decoder = load_decoder()
+            assert decoder is load_decoder(name)
+            decoded[name] = decoder(BODY)
+
+    assert "json" in decoded
+    assert all(value == decoded["json"] for value in decoded.values())
+
+
+def test_decoder_errors(monkeypatch):
+    with pytest.raises(ValueError):
+        load_decoder("simplejson")
+
+    block_decoder(monkeypatch, "orjson")
+    assert "orjson" not in available_decoders()
+    with pytest.raises(RuntimeError):
+        load_decoder("orjson")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", list(DECODERS))
+async def test_source_json_decoder(make_source, name):
+    if name not in available_decoders():
+        pytest.skip(f"{name} not installed")
+
+    source = make_source(JSON_DECODER=name)
+    await source.login()
+    assert source.json_decoder is load_decoder(name)
+
+    col = COLLECTIONS["devices"](source=source)
+    await col.fetch()
+
+    expected = make_source(JSON_DECODER="json")
+    await expected.login()
+    exp_col = COLLECTIONS["devices"](source=expected)
+    await exp_col.fetch()
+
+    assert col.source_records == exp_col.source_records
+
+    await source.logout()
+    await expected.logout()
@@ -0,0 +1,149 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+
+import pytest
+
+from nauti_ipfabric.delta import CollectionDelta, partition_digest
+
+from conftest import COLLECTIONS, RecordingIPFabric
+
+
+class ChangedIPFabric(RecordingIPFabric):
+    """
+    The mock IPF system of a later snapshot: device 0 is replaced, device 3
+    moved to another site, and device 5 has a new model.
+    """
+
+    SNAPSHOT_ID = "mock-snapshot-2"
+
+    def site(self, dev_id: int) -> str:
+        return super().site(4 if dev_id == 3 else dev_id)
+
+    def _device(self, dev_id: int, index) -> dict:
+        rec = super()._device(dev_id, index)
+        if dev_id == 0:
+            rec["snHw"] = "HWNEW"
+        elif dev_id == 5:
+            rec["model"] = "bench-96"
+        return rec
+
+
+def test_partition_digest_order():
+    recs = [dict(a=1, b=2), dict(a=2, b=1)]
+
+    assert partition_digest(recs) == partition_digest(recs[::-1])
+    assert partition_digest(recs) != partition_digest(recs[:1])
+
+
+def test_compare_and_moves():
+    key = lambda item: item["sn"]  # noqa: E731
+    delta = CollectionDelta(baseline={})
+
+    delta.compare(key, [dict(sn=1, site="a"), dict(sn=2, site="a")], [])
+    delta.compare(key, [dict(sn=3, site="b")], [dict(sn=1, site="b")])
+    delta.compare(key, [], [dict(sn=2, site="a")])
+    delta.resolve_moves()
+
+    assert delta.updated == {1: dict(sn=1, site="b")}
+    assert delta.deleted == {3: dict(sn=3, site="b")}
+    assert not delta.added
+
+
+@pytest.mark.asyncio
+async def test_fetch_delta(make_source, mock_ipf):
+    prior_src = make_source()
+    await prior_src.login()
+
+    col = COLLECTIONS["devices"](source=prior_src)
+    delta = await col.fetch_delta()
+
+    assert len(delta.added) == len(col.items) == mock_ipf.n_devices
+    assert not (delta.updated or delta.deleted)
+
+    # the baseline of the same snapshot restores the items without fetching.
+
+    baseline = json.loads(json.dumps(delta.baseline))
+    requests = len(mock_ipf.bodies)
+
+    col = COLLECTIONS["devices"](source=prior_src)
+    assert not await col.fetch_delta(baseline)
+    assert len(col.items) == mock_ipf.n_devices
+    assert len(mock_ipf.bodies) == requests
+
+    await prior_src.logout()
+
+    # the baseline compared with the later snapshot.
+
+    changed = ChangedIPFabric(devices=20, interfaces=4, portchans=1, sites=4)
+    source = make_source(mock=changed)
+    await source.login()
+
+    col = COLLECTIONS["devices"](source=source)
+    delta = await col.fetch_delta(baseline)
+
+    assert set(delta.added) == {"HWNEW"}
+    assert set(delta.deleted) == {"HW00000000"}
+    assert set(delta.updated) == {"HW00000003", "HW00000005"}
+    assert delta.updated["HW00000003"]["site"] == "site0000"
+    assert delta.updated["HW00000005"]["model"] == "bench-96"
+
+    assert delta.baseline["snapshot"] == ChangedIPFabric.SNAPSHOT_ID
+    assert len(col.items) == changed.n_devices
+
+    await source.logout()
+
+
+class OSChangedIPFabric(RecordingIPFabric):
+    """ the mock IPF system of a later snapshot in which device 1 runs EXOS """
+
+    SNAPSHOT_ID = "mock-snapshot-2"
+
+    def _device(self, dev_id: int, index) -> dict:
+        rec = super()._device(dev_id, index)
+        if dev_id == 1:
+            rec["family"] = "exos"
+        return rec
+
+
+@pytest.mark.asyncio
+async def test_fetch_delta_device_os_change(make_source, mock_ipf):
+    source = make_source()
+    await source.login()
+    delta = await COLLECTIONS["interfaces"](source=source).fetch_delta()
+    await source.logout()
+
+    # the interface records of device 1 are unchanged, but the names are now
+    # normalized as EXOS names.
+
+    changed = OSChangedIPFabric(devices=20, interfaces=4, portchans=1, sites=4)
+    source = make_source(mock=changed)
+    await source.login()
+
+    col = COLLECTIONS["interfaces"](source=source)
+    delta = await col.fetch_delta(delta.baseline)
+
+    host = source.hostnames[changed.hostname(1)]
+    assert delta.deleted
+    assert {key[0] for key in delta.deleted} == {host}
+    assert not delta.updated
+
+    expected = COLLECTIONS["interfaces"](source=source)
+    await expected.fetch()
+    expected.make_keys()
+    assert col.items == expected.items
+
+    await source.logout()
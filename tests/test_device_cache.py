@@ -0,0 +1,107 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from nauti_ipfabric import device_cache
+
+DEVICES_URL = "/tables/inventory/devices"
+
+
+def device_requests(mock_ipf):
+    return [body for path, body in mock_ipf.bodies if path == DEVICES_URL]
+
+
+def site_filter(site_id):
+    return {"siteName": ["eq", f"site{site_id:04d}"]}
+
+
+@pytest.mark.asyncio
+async def test_device_cache_shared_fetch(source, mock_ipf):
+    mock_ipf.latency = 0.01
+    cache = source.device_cache
+
+    first, second = await asyncio.gather(cache.get(), cache.get())
+
+    assert first is second
+    assert len(first.items) == mock_ipf.n_devices
+    assert len(device_requests(mock_ipf)) == 1
+    assert not cache._locks
+
+    # the unfiltered inventory serves the filtered requests.
+
+    assert await cache.get(filters=site_filter(1)) is first
+    assert len(device_requests(mock_ipf)) == 1
+
+
+@pytest.mark.asyncio
+async def test_device_cache_filtered_entries(source, mock_ipf):
+    cache = source.device_cache
+    dev_col = await cache.get(filters=site_filter(1))
+
+    assert set(dev_col.items) == {
+        mock_ipf.hostname(dev_id).split(".")[0]
+        for dev_id in range(mock_ipf.n_devices)
+        if mock_ipf.site(dev_id) == "site0001"
+    }
+    assert await cache.get(filters=site_filter(1)) is dev_col
+    assert len(device_requests(mock_ipf)) == 1
+    assert not cache._locks
+
+
+@pytest.mark.asyncio
+async def test_device_cache_purges_expired(source, monkeypatch):
+    cache = source.device_cache
+    cache.ttl = 10
+    now = 1000.0
+    monkeypatch.setattr(device_cache.time, "monotonic", lambda: now)
+
+    await cache.get(filters=site_filter(0))
+    await cache.get(filters=site_filter(1))
+    assert len(cache._entries) == 2
+
+    now += 60
+    await cache.get(filters=site_filter(2))
+
+    assert [key[1] for key in cache._entries] == [
+        device_cache._filter_key(site_filter(2))
+    ]
+
+
+@pytest.mark.asyncio
+async def test_device_cache_bounded(source, monkeypatch):
+    cache = source.device_cache
+    monkeypatch.setattr(cache, "MAX_ENTRIES", 2)
+
+    for site_id in range(4):
+        await cache.get(filters=site_filter(site_id))
+
+    assert [key[1] for key in cache._entries] == [
+        device_cache._filter_key(site_filter(site_id)) for site_id in (2, 3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_device_cache_invalidate(source, mock_ipf):
+    cache = source.device_cache
+    await cache.get()
+
+    cache.invalidate(snapshot=source.client.active_snapshot)
+    assert not cache._entries
+
+    await cache.get()
+    assert len(device_requests(mock_ipf)) == 2
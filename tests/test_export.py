@@ -0,0 +1,137 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from conftest import COLLECTIONS
+
+pa = pytest.importorskip("pyarrow")
+
+from nauti_ipfabric.export import _TableWriter  # noqa: E402
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("suffix", [".arrow", ".parquet"])
+async def test_export_import(source, tmp_path, suffix):
+    items_path = tmp_path / f"devices{suffix}"
+    records_path = tmp_path / f"devices-records{suffix}"
+
+    col = COLLECTIONS["devices"](source=source)
+    count = await col.export_columnar(
+        str(items_path), records_path=str(records_path), page_size=7
+    )
+
+    expected = COLLECTIONS["devices"](source=source)
+    await expected.fetch()
+    expected.make_keys()
+    assert count == len(expected.items)
+
+    if suffix == ".arrow":
+        with pa.memory_map(str(items_path)) as mapped:
+            assert pa.ipc.open_file(mapped).num_record_batches == 3
+
+    imported = COLLECTIONS["devices"](source=source)
+    metadata = imported.import_columnar(str(items_path))
+
+    assert metadata["kind"] == "items"
+    assert metadata["snapshot"] == source.client.active_snapshot
+    assert imported.items == expected.items
+    assert imported.lookup("site", "site0001")
+
+    records = COLLECTIONS["devices"](source=source)
+    assert records.import_columnar(str(records_path))["kind"] == "records"
+    assert records.source_records == expected.source_records
+
+    with pytest.raises(ValueError):
+        COLLECTIONS["sites"](source=source).import_columnar(str(items_path))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("suffix", [".arrow", ".parquet"])
+async def test_import_replaces_data(make_source, tmp_path, suffix):
+    items_path = tmp_path / f"devices{suffix}"
+    records_path = tmp_path / f"devices-records{suffix}"
+
+    source = make_source()
+    await source.login()
+
+    site = "site0001"
+    exported = COLLECTIONS["devices"](source=source)
+    await exported.export_columnar(
+        str(items_path), records_path=str(records_path), filters=f"siteName = {site}"
+    )
+
+    # each file is imported into a collection holding the complete inventory.
+
+    for path in (items_path, records_path):
+        col = COLLECTIONS["devices"](source=source)
+        await col.fetch_inventory()
+        col.import_columnar(str(path))
+
+        # the imported records are keyed, as fetched records are, by make_keys.
+
+        if path is records_path:
+            assert not col.items and not col.source_record_keys
+            col.make_keys()
+
+        assert col.items and all(item["site"] == site for item in col.items.values())
+        assert col.lookup("site", "site0000") == []
+        assert len(col.lookup("site", site)) == len(col.items)
+
+        if path is records_path:
+            assert len(col.source_records) == len(col.items)
+            assert set(col.source_record_keys) == set(col.items)
+        else:
+            assert not col.source_record_keys
+
+    await source.logout()
+
+
+def read_back(path):
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def test_writer_unifies_null_columns(tmp_path):
+    path = tmp_path / "pages.arrow"
+    writer = _TableWriter(path, dict(collection="test", kind="items"))
+    writer.write([dict(a=1, b=None), dict(a=2, b=None)])
+    writer.write([dict(a=3, b=30)])
+    writer.close()
+
+    table = read_back(path)
+    assert table.schema.field("b").type == pa.int64()
+    assert table.column("b").to_pylist() == [None, None, 30]
+
+
+def test_writer_casts_after_schema_set(tmp_path, monkeypatch):
+    monkeypatch.setattr(_TableWriter, "BUFFER_ROWS", 1)
+
+    path = tmp_path / "pages.arrow"
+    writer = _TableWriter(path, dict(collection="test", kind="items"))
+    writer.write([dict(a=1, b=None)])
+    writer.write([dict(a=2, b=5)])
+    writer.write([dict(a=3, b="x")])
+    writer.close()
+
+    table = read_back(path)
+    assert table.schema.field("b").type == pa.string()
+    assert table.column("b").to_pylist() == [None, "5", "x"]
+
+
+def test_writer_empty(tmp_path):
+    path = tmp_path / "empty.arrow"
+    _TableWriter(path, dict(collection="test", kind="items")).close()
+    assert read_back(path).num_rows == 0
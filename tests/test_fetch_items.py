@@ -0,0 +1,114 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from conftest import COLLECTIONS
+
+
+async def some_keys(source, name, dev_ids):
+    """ return the item keys of the devices, from a complete fetch """
+    col = COLLECTIONS[name](source=source)
+    await col.fetch()
+    col.make_keys()
+
+    hosts = {
+        col.source.hostnames[f"sw{dev_id:06d}.bench.example"] for dev_id in dev_ids
+    }
+    return {key: None for key, item in col.items.items() if item["hostname"] in hosts}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["interfaces", "ipaddrs", "portchans"])
+@pytest.mark.parametrize("batch_size", [1, 50])
+async def test_fetch_items(make_source, mock_ipf, name, batch_size):
+    source = make_source()
+    await source.login()
+    keys = await some_keys(source, name, [3, 7])
+    assert keys
+
+    # a new source, so that the device cache is empty.
+
+    await source.logout()
+    source = make_source()
+    await source.login()
+    mock_ipf.bodies.clear()
+
+    col = COLLECTIONS[name](source=source)
+    await col.fetch_items(keys, batch_size=batch_size)
+
+    assert set(col.items) == set(keys)
+    assert len(col.source_records) == len(keys)
+    assert set(col.source_record_keys) == set(keys)
+
+    # the devices used by the collection are fetched with the batch filter
+    # rather than the complete devices table.
+
+    for path, body in mock_ipf.bodies:
+        assert body["filters"], path
+
+    await source.logout()
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_not_itemized_again(source, monkeypatch):
+    keys = await some_keys(source, "ipaddrs", [1])
+    col = COLLECTIONS["ipaddrs"](source=source)
+
+    itemized = list()
+    itemize = col.itemize
+    monkeypatch.setattr(
+        col, "itemize", lambda rec: itemized.append(rec) or itemize(rec)
+    )
+
+    await col.fetch_items(keys)
+
+    assert set(col.items) == set(keys)
+    assert len(itemized) == len(keys)
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_unsupported(source):
+    col = COLLECTIONS["devices"](source=source)
+    with pytest.raises(NotImplementedError):
+        await col.fetch_items({"SN1": None})
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_batch_caches(make_source, mock_ipf):
+    source = make_source()
+    await source.login()
+
+    # device 0 is EXOS, and device 3 is not; the interface names of each are
+    # normalized using the devices prepared by its own batch.
+
+    expected = COLLECTIONS["interfaces"](source=source)
+    await expected.fetch()
+    expected.make_keys()
+    hosts = {source.hostnames[mock_ipf.hostname(dev_id)] for dev_id in (0, 3)}
+    keys = {key: None for key, item in expected.items.items() if key[0] in hosts}
+
+    await source.logout()
+    source = make_source()
+    await source.login()
+    mock_ipf.latency = 0.01
+
+    col = COLLECTIONS["interfaces"](source=source)
+    await col.fetch_items(keys, batch_size=1, concurrency=2)
+
+    assert col.items == {key: expected.items[key] for key in keys}
+    assert not col.cache
+
+    await source.logout()
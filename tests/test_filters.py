@@ -0,0 +1,79 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from nauti_ipfabric.filters import (
+    filter_any,
+    filter_all,
+    create_filter_compiler,
+    FilterBuilder,
+)
+
+
+def test_filter_any():
+    assert filter_any("hostname", ["sw1"]) == {"hostname": ["eq", "sw1"]}
+    assert filter_any("hostname", ["sw1", "sw2"], oper="like") == {
+        "or": [{"hostname": ["like", "sw1"]}, {"hostname": ["like", "sw2"]}]
+    }
+
+
+def test_filter_all():
+    site = {"siteName": ["eq", "atl"]}
+    host = {"hostname": ["eq", "sw1"]}
+
+    assert filter_all() is None
+    assert filter_all(None, {}) is None
+    assert filter_all(None, site) is site
+    assert filter_all(site, None, host) == {"and": [site, host]}
+
+
+def test_filter_compiler_memoized():
+    compile_filter = create_filter_compiler(maxsize=8)
+
+    first = compile_filter("siteName = atl")
+    assert first == {"siteName": ["eq", "atl"]}
+    assert compile_filter("siteName = atl") is first
+    assert compile_filter.cache_info().hits == 1
+
+
+def test_filter_builder():
+    site = {"siteName": ["eq", "atl"]}
+    base = FilterBuilder(site, None)
+
+    assert FilterBuilder().build() is None
+    assert base.build() is site
+
+    built = base.eq("family", "eos").any("hostname", ["sw1", "sw2"]).build()
+    assert built == {
+        "and": [
+            site,
+            {"family": ["eq", "eos"]},
+            {"or": [{"hostname": ["eq", "sw1"]}, {"hostname": ["eq", "sw2"]}]},
+        ]
+    }
+
+    # the builder methods do not change the base builder.
+
+    assert base.clauses == (site,)
+    assert base.where({"vendor": ["eq", "arista"]}).clauses[0] is site
+
+
+@pytest.mark.asyncio
+async def test_source_filter(source):
+    built = source.filter("siteName = atl").any("hostname", ["sw1"]).build()
+
+    assert built == {"and": [{"siteName": ["eq", "atl"]}, {"hostname": ["eq", "sw1"]}]}
+    assert source.compile_filter("siteName = atl") is built["and"][0]
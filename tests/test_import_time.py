@@ -0,0 +1,42 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from pathlib import Path
+import subprocess
+import sys
+
+BENCH_IMPORT = Path(__file__).parents[1] / "benchmarks" / "bench_import.py"
+
+
+def test_plugin_import_time():
+    """ the plugin modules import within budget, without the deferred modules """
+
+    # the check is run in a new interpreter, since the test session has
+    # already imported the modules.
+
+    proc = subprocess.run(
+        [sys.executable, str(BENCH_IMPORT)], capture_output=True, text=True
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+
+
+def test_source_exports_client():
+    """ IPFabricClient remains exported by the source module, imported on use """
+    from nauti_ipfabric import source
+    from nauti_ipfabric.client import IPFabricClient
+
+    assert source.__all__ == ["IPFabricSource", "IPFabricClient"]
+    assert source.IPFabricClient is IPFabricClient
+    assert source.IPFabricSource.client_class is IPFabricClient
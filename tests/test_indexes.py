@@ -0,0 +1,115 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from nauti_ipfabric.indexes import Index, CollectionIndexes
+from nauti_ipfabric.records import CompactRecord
+
+from conftest import COLLECTIONS
+
+
+def test_indexes_add_discard():
+    indexes = CollectionIndexes(
+        dict(name=Index(("name",), unique=True), site=Index(("site",)))
+    )
+    a = dict(name="a", site="atl")
+    b = dict(name="b", site="atl")
+    c = dict(name="c", site="nyc")
+
+    for key, item in (("ka", a), ("kb", b), ("kc", c)):
+        indexes.add(key, item)
+
+    assert indexes.keys("name", "b") == ["kb"]
+    assert sorted(indexes.keys("site", "atl")) == ["ka", "kb"]
+    assert indexes.keys("site", "nyc") == ["kc"]
+    assert indexes.keys("site", "sfo") == []
+
+    indexes.discard("ka", a)
+    assert indexes.keys("name", "a") == []
+    assert indexes.keys("site", "atl") == ["kb"]
+
+    indexes.discard("kb", b)
+    indexes.discard("kc", c)
+    assert indexes.keys("site", "atl") == indexes.keys("site", "nyc") == []
+
+    indexes.add("kc", c)
+    indexes.add("kc", c)
+    assert indexes.keys("site", "nyc") == ["kc"]
+
+    indexes.clear()
+    assert indexes.keys("name", "c") == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compact", [False, True])
+async def test_make_keys_indexes(make_source, mock_ipf, compact):
+    source = make_source(COMPACT_RECORDS=compact)
+    await source.login()
+
+    col = COLLECTIONS["interfaces"](source=source)
+    await col.fetch()
+    col.make_keys()
+
+    host = mock_ipf.hostname(3).split(".")[0]
+    found = col.lookup("hostname", host)
+
+    assert len(found) == mock_ipf.n_interfaces
+    assert all(item["hostname"] == host for item in found)
+    assert all(isinstance(item, CompactRecord) == compact for item in found)
+
+    site = mock_ipf.site(3)
+    assert len(col.lookup("site", site)) == sum(
+        mock_ipf.n_interfaces
+        for dev_id in range(mock_ipf.n_devices)
+        if mock_ipf.site(dev_id) == site
+    )
+
+    # keying again replaces, rather than adds to, the index entries.
+
+    col.make_keys()
+    assert len(col.lookup("hostname", host)) == mock_ipf.n_interfaces
+
+    await source.logout()
+
+
+@pytest.mark.asyncio
+async def test_make_keys_with_filter_translate(source, mock_ipf):
+    col = COLLECTIONS["devices"](source=source)
+    await col.fetch()
+
+    col.make_keys(
+        "hostname",
+        with_filter=lambda item: item["site"] == "site0001",
+        with_translate=str.upper,
+    )
+
+    assert col.items
+    assert all(key.isupper() for key in col.items)
+    assert all(item["site"] == "site0001" for item in col.items.values())
+    assert set(col.source_record_keys) == set(col.items)
+
+    host = next(iter(col.items.values()))["hostname"]
+    assert col.lookup("hostname", host) == [col.items[host.upper()]]
+
+
+@pytest.mark.asyncio
+async def test_unique_index_lookup(source):
+    col = COLLECTIONS["devices"](source=source)
+    await col.fetch_inventory()
+
+    for key, item in col.items.items():
+        assert col.lookup("ipaddr", item["ipaddr"]) == [item]
+        assert col.lookup("hostname", item["hostname"]) == [item]
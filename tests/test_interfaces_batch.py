@@ -0,0 +1,67 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from nauti_ipfabric.filters import filter_any
+
+from conftest import COLLECTIONS
+
+INTERFACES_URL = "/tables/inventory/interfaces"
+DEVICES_URL = "/tables/inventory/devices"
+
+
+def table_filters(mock_ipf, table):
+    return [body["filters"] for path, body in mock_ipf.bodies if path == table]
+
+
+@pytest.mark.asyncio
+async def test_fetch_hostname_batches(source, mock_ipf):
+    mock_ipf.latency = 0.005
+    hostnames = [mock_ipf.hostname(dev_id) for dev_id in range(5)]
+
+    col = COLLECTIONS["interfaces"](source=source)
+    await col.fetch(hostname=hostnames, batch_size=2, concurrency=2)
+
+    # one request per batch of hostnames, stored in batch order; the
+    # complete device inventory is fetched once for all the batches.
+
+    batches = [hostnames[0:2], hostnames[2:4], hostnames[4:5]]
+    assert sorted(map(repr, table_filters(mock_ipf, INTERFACES_URL))) == sorted(
+        repr(filter_any("hostname", batch)) for batch in batches
+    )
+    assert table_filters(mock_ipf, DEVICES_URL) == [{}]
+
+    assert [rec["hostname"] for rec in col.source_records] == [
+        host for host in hostnames for _ in range(mock_ipf.n_interfaces)
+    ]
+
+    col.make_keys()
+    assert len(col.items) == len(hostnames) * mock_ipf.n_interfaces
+
+
+@pytest.mark.asyncio
+async def test_fetch_hostnames_one_batch(source, mock_ipf):
+    hostnames = [mock_ipf.hostname(dev_id) for dev_id in range(3)]
+
+    col = COLLECTIONS["interfaces"](source=source)
+    await col.fetch(hostname=hostnames, batch_size=3)
+
+    # the devices are fetched with the same hostname filter.
+
+    host_filter = filter_any("hostname", hostnames)
+    assert table_filters(mock_ipf, INTERFACES_URL) == [host_filter]
+    assert table_filters(mock_ipf, DEVICES_URL) == [host_filter]
+    assert len(col.source_records) == len(hostnames) * mock_ipf.n_interfaces
@@ -0,0 +1,85 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from nauti_ipfabric.interning import InternMap, intern_item
+
+from conftest import COLLECTIONS
+
+
+def test_intern_map():
+    upper = InternMap(str.upper)
+    value = "".join(["at", "l"])
+
+    assert upper[value] == "ATL"
+    assert upper["atl"] is upper[value]
+    assert list(upper) == ["atl"]
+
+
+def test_intern_item():
+    name = "".join(["Ether", "net1"])
+    item = intern_item(dict(interface=name, mtu=1500))
+
+    assert item == dict(interface="Ethernet1", mtu=1500)
+    assert item["interface"] is intern_item(dict(interface="Ethernet1"))["interface"]
+    assert intern_item(None) is None
+
+
+@pytest.mark.asyncio
+async def test_expander_stats_count_itemize(source, mock_ipf):
+    col = COLLECTIONS["portchans"](source=source)
+    await col.fetch()
+    col.make_keys()
+
+    # each portchan item expands the member and the portchan name; the
+    # expander is the only memo of the interface names.
+
+    stats = source.expander_stats()["expands.interface"]
+    assert stats["hits"] + stats["misses"] == 2 * len(col.items)
+    assert stats["misses"] == stats["currsize"] < len(col.items)
+
+    first, second = list(col.items.values())[:2]
+    assert first["portchan"] is second["portchan"]
+
+
+@pytest.mark.asyncio
+async def test_make_keys_parallel_interned(make_source):
+    source = make_source(ITEMIZE_CHUNK_SIZE=16)
+    await source.login()
+
+    col = COLLECTIONS["ipaddrs"](source=source)
+    await col.fetch()
+    await col.make_keys_parallel(processes=2)
+
+    expected = COLLECTIONS["ipaddrs"](source=source)
+    await expected.fetch()
+    expected.make_keys()
+
+    # the worker processes normalize the hostnames with the nauti function,
+    # rather than the test registry function, so the hostnames are not
+    # compared.
+
+    def fields(items):
+        return sorted(
+            (item["ipaddr"], item["interface"], item["site"]) for item in items
+        )
+
+    assert fields(col.items.values()) == fields(expected.items.values())
+
+    sites = {id(item["site"]) for item in col.items.values()}
+    assert len(sites) == len({item["site"] for item in col.items.values()})
+
+    await source.logout()
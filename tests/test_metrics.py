@@ -0,0 +1,85 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from conftest import COLLECTIONS
+from nauti_ipfabric.metrics import MetricsRecorder
+
+
+@pytest.mark.asyncio
+async def test_recorder_counters(source):
+    recorder = MetricsRecorder()
+    source.metrics.subscribe(recorder)
+
+    col = COLLECTIONS["devices"](source=source)
+    await col.fetch()
+    col.make_keys()
+    pages = [page async for page in col.fetch_pages(page_size=7)]
+
+    totals = recorder.tables["fetch_devices"]
+    assert totals["requests"] == 1 + len(pages)
+    assert totals["rows"] == 2 * len(col.source_records)
+    assert totals["pages"] == len(pages)
+    assert totals["cached"] == totals["retries"] == 0
+    assert totals["bytes"] > 0 and totals["seconds"] > 0
+
+    assert recorder.collections["devices"]["records"] == 20
+    assert recorder.collections["devices"]["items"] == len(col.items)
+
+    # once unsubscribed the hook is false, and the events are not emitted.
+
+    source.metrics.unsubscribe(recorder)
+    assert not source.metrics
+    await col.fetch()
+    assert recorder.tables["fetch_devices"]["requests"] == 1 + len(pages)
+
+    recorder.reset()
+    assert not recorder.tables and not recorder.collections
+
+
+def test_recorder_prometheus():
+    recorder = MetricsRecorder()
+    fields = dict(seconds=0.5, decode_seconds=0.25, bytes=100, wire_bytes=40)
+    recorder("request", dict(table="devices", rows=20, cached=False, **fields))
+    recorder("request", dict(table="devices", rows=0, cached=True, **fields))
+    recorder("page", dict(table="devices", page=1, rows=20))
+    recorder("retry", dict(table="devices", status=429, delay=1.0))
+    recorder("itemize", dict(collection="devices", records=20, items=18, seconds=1))
+    recorder("unknown", dict())
+
+    stats = {"expands.interface": dict(hits=3, misses=2, maxsize=8, currsize=2)}
+    lines = recorder.to_prometheus(stats).splitlines()
+
+    for line in (
+        "# TYPE nauti_ipfabric_table_requests_total counter",
+        'nauti_ipfabric_table_requests_total{table="devices"} 2',
+        'nauti_ipfabric_table_cached_total{table="devices"} 1',
+        'nauti_ipfabric_table_seconds_total{table="devices"} 1.0',
+        'nauti_ipfabric_table_wire_bytes_total{table="devices"} 80',
+        'nauti_ipfabric_table_rows_total{table="devices"} 20',
+        'nauti_ipfabric_table_pages_total{table="devices"} 1',
+        'nauti_ipfabric_table_retries_total{table="devices"} 1',
+        'nauti_ipfabric_itemize_items_total{collection="devices"} 18',
+        "# TYPE nauti_ipfabric_expander_hits gauge",
+        'nauti_ipfabric_expander_hits{expander="expands.interface"} 3',
+        'nauti_ipfabric_expander_currsize{expander="expands.interface"} 2',
+    ):
+        assert line in lines
+
+    # without the expander stats the metric types are still declared.
+
+    text = MetricsRecorder().to_prometheus()
+    assert text.endswith("# TYPE nauti_ipfabric_expander_currsize gauge\n")
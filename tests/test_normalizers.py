@@ -0,0 +1,101 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from nauti_ipfabric.normalizers import (
+    BUILTIN_NORMALIZERS,
+    NormalizerDispatch,
+    load_normalizers,
+    normalize_exos,
+)
+
+from conftest import COLLECTIONS
+
+
+def normalize_upper(if_name, rec):
+    return if_name.upper()
+
+
+def test_normalize_exos():
+    no_ip, with_ip = dict(primaryIp=None), dict(primaryIp="192.0.2.1")
+
+    assert normalize_exos("1:7", no_ip) == "Ethernet7"
+    assert normalize_exos("2:7", no_ip) == "Ethernet2/7"
+
+    # VLAN ports are kept only when they have an IP address.
+
+    assert normalize_exos("vlan10", no_ip) is None
+    assert normalize_exos("vlan10", with_ip) == "vlan10"
+
+
+def test_load_normalizers():
+    assert load_normalizers() == BUILTIN_NORMALIZERS
+
+    normalizers = load_normalizers(dict(nxos=f"{__name__}:normalize_upper"))
+    assert normalizers["nxos"] is normalize_upper
+    assert normalizers["exos"] is normalize_exos
+
+    for spec in ("no.such.module:func", f"{__name__}:no_such_func"):
+        with pytest.raises(RuntimeError):
+            load_normalizers(dict(nxos=spec))
+
+
+def test_dispatch_by_os_name():
+    os_names = dict(sw1="exos", sw2="nxos", sw3="eos")
+    resolved = list()
+
+    def os_name_of(hostname):
+        resolved.append(hostname)
+        return os_names[hostname]
+
+    def default(if_name, rec):
+        return f"default-{if_name}"
+
+    dispatch = NormalizerDispatch(
+        os_names=os_name_of,
+        normalizers=load_normalizers(dict(nxos=f"{__name__}:normalize_upper")),
+        default=default,
+    )
+    rec = dict(primaryIp=None)
+
+    assert dispatch["sw1"]("1:1", rec) == "Ethernet1"
+    assert dispatch["sw2"]("eth1/1", rec) == "ETH1/1"
+
+    # an os_name without a normalizer uses the default.
+
+    assert dispatch["sw3"]("Et1", rec) == "default-Et1"
+
+    # the normalizer of each device is resolved once.
+
+    dispatch["sw1"]("1:2", rec)
+    assert resolved == ["sw1", "sw2", "sw3"]
+
+
+@pytest.mark.asyncio
+async def test_interfaces_normalized(source, mock_ipf):
+    col = COLLECTIONS["interfaces"](source=source)
+    await col.fetch()
+    col.make_keys()
+
+    exos = source.hostnames[mock_ipf.hostname(0)]
+    eos = source.hostnames[mock_ipf.hostname(1)]
+    assert mock_ipf.family(0) == "exos" and mock_ipf.family(1) == "eos"
+
+    # the EXOS ports "1:<n>", and the expanded EOS names "Et<n>".
+
+    names = sorted(key[1] for key in col.items if key[0] == exos)
+    assert names == [f"Ethernet{n}" for n in range(1, mock_ipf.n_interfaces + 1)]
+    assert (eos, "Ethernet1") in col.items
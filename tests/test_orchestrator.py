@@ -0,0 +1,70 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from nauti_ipfabric.devices import IPFabricDeviceCollection
+from nauti_ipfabric.orchestrator import fetch_collections, dependency_order
+
+
+def test_dependency_order():
+    order = dependency_order(
+        dict(interfaces=("devices",), devices=(), portchans=("devices",))
+    )
+    assert order.index("devices") < order.index("interfaces")
+    assert order.index("devices") < order.index("portchans")
+
+    with pytest.raises(ValueError):
+        dependency_order(dict(a=("b",), b=("a",)))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stream", [False, True])
+async def test_fetch_collections_devices_once(source, mock_ipf, monkeypatch, stream):
+    itemized = list()
+    itemize = IPFabricDeviceCollection.itemize
+
+    def counted_itemize(self, rec):
+        itemized.append(rec["sn"])
+        return itemize(self, rec)
+
+    monkeypatch.setattr(IPFabricDeviceCollection, "itemize", counted_itemize)
+
+    cols = await fetch_collections(
+        source, ["interfaces", "portchans", "devices"], stream=stream
+    )
+    devices = cols["devices"]
+
+    paths = [path for path, _ in mock_ipf.bodies]
+    assert paths.count("/tables/inventory/devices") == 1
+
+    # each device record is itemized once; the device cache is primed from
+    # the devices items, keyed by hostname.
+
+    assert len(itemized) == mock_ipf.n_devices
+    cached = await source.device_cache.get()
+    assert len(cached.items) == len(devices.items) == mock_ipf.n_devices
+    for item in devices.items.values():
+        assert cached.items[item["hostname"]] is item
+
+    assert len(cols["interfaces"].items) == mock_ipf.n_devices * mock_ipf.n_interfaces
+
+
+@pytest.mark.asyncio
+async def test_fetch_collections_dependency_only(source, mock_ipf):
+    cols = await fetch_collections(source, ["interfaces"])
+
+    assert list(cols) == ["interfaces"]
+    assert [path for path, _ in mock_ipf.bodies].count("/tables/inventory/devices") == 1
@@ -0,0 +1,91 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from conftest import COLLECTIONS
+
+
+def table_filters(mock_ipf, table):
+    return [body["filters"] for path, body in mock_ipf.bodies if path == table]
+
+
+async def fetched(source, name):
+    col = COLLECTIONS[name](source=source)
+    await col.fetch()
+    col.make_keys()
+    return col
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "name, table",
+    [("devices", "inventory/devices"), ("interfaces", "inventory/interfaces")],
+)
+async def test_fetch_partitioned_sites(source, mock_ipf, name, table):
+    mock_ipf.latency = 0.005
+
+    col = COLLECTIONS[name](source=source)
+    await col.fetch_partitioned()
+
+    # one request per site, filtered by the site name, in site name order.
+
+    sites = [mock_ipf.site(site_id) for site_id in range(mock_ipf.n_sites)]
+    assert table_filters(mock_ipf, f"/tables/{table}") == [
+        {"siteName": ["eq", site]} for site in sites
+    ]
+    assert [rec["siteName"] for rec in col.source_records] == sorted(
+        rec["siteName"] for rec in col.source_records
+    )
+
+    # merged, the partitions are the complete table.
+
+    col.make_keys()
+    expected = await fetched(source, name)
+    assert col.items == expected.items
+    assert sorted(map(repr, col.source_records)) == sorted(
+        map(repr, expected.source_records)
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetch_partitioned_key(source, mock_ipf):
+    col = COLLECTIONS["devices"](source=source)
+    await col.fetch_partitioned(
+        partitions=["exos", "eos", "exos"],
+        partition_key="family",
+        filters="siteName = site0001",
+    )
+
+    # the partition filter is added to the fetch filter.
+
+    assert table_filters(mock_ipf, "/tables/inventory/devices") == [
+        {"and": [{"siteName": ["eq", "site0001"]}, {"family": ["eq", family]}]}
+        for family in ("eos", "exos")
+    ]
+
+    expected = {
+        mock_ipf.hostname(dev_id)
+        for dev_id in range(mock_ipf.n_devices)
+        if mock_ipf.site(dev_id) == "site0001"
+    }
+    assert {rec["hostname"] for rec in col.source_records} == expected
+
+
+@pytest.mark.asyncio
+async def test_fetch_partitioned_requires_partitions(source):
+    col = COLLECTIONS["devices"](source=source)
+    with pytest.raises(ValueError):
+        await col.fetch_partitioned(partition_key="family")
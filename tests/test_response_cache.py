@@ -0,0 +1,67 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from nauti_ipfabric.response_cache import ResponseCache, dump_records, load_records
+
+from conftest import COLLECTIONS
+
+
+def test_dump_load_records():
+    records = [dict(a=1, b="x"), dict(b="y", c=None), dict()]
+    assert load_records(dump_records(records)) == [
+        dict(a=1, b="x", c=None),
+        dict(a=None, b="y", c=None),
+        dict(a=None, b=None, c=None),
+    ]
+
+
+def test_response_cache_evicts_lru(tmp_path):
+    records = [dict(n=n) for n in range(10)]
+    size = len(dump_records(records))
+
+    cache = ResponseCache(directory=tmp_path, max_size=2 * size)
+    cache.put("a", records)
+    cache.put("b", records)
+    assert cache.get("a") == records
+
+    cache.put("c", records)
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == records
+
+    # the cache persists across instances.
+
+    assert ResponseCache(directory=tmp_path, max_size=2 * size).get("c") == records
+
+    cache.clear()
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_source_response_cache(make_source, mock_ipf, tmp_path):
+    for run in range(2):
+        source = make_source(RESPONSE_CACHE_DIR=str(tmp_path))
+        await source.login()
+
+        col = COLLECTIONS["devices"](source=source)
+        await col.fetch()
+        assert len(col.source_records) == mock_ipf.n_devices
+
+        await source.logout()
+
+    # the second run is served from the cache.
+
+    assert len(mock_ipf.bodies) == 1
@@ -0,0 +1,229 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from importlib.metadata import version
+from pathlib import Path
+import asyncio
+import json
+import re
+import stat
+
+import httpx
+import pytest
+
+from mock_ipf import MockIPFabric
+
+from nauti_ipfabric.source import IPFabricSource
+from nauti_ipfabric import session_cache
+from nauti_ipfabric.session_cache import SessionCache
+
+from conftest import COLLECTIONS
+
+
+class AuthIPFabric(MockIPFabric):
+    """ mock IPF system requiring a login, with expiring access tokens """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.issued = 0
+        self.valid = set()
+        self.paths = list()
+
+    def _access_token(self):
+        self.issued += 1
+        token = f"access{self.issued}"
+        self.valid = {token}
+        return token
+
+    def expire(self):
+        self.valid = set()
+
+    async def __call__(self, request):
+        path = request.url.path.split("/api/v1/")[-1]
+        self.paths.append(path)
+
+        if path == "auth/login":
+            return httpx.Response(
+                200, json=dict(accessToken=self._access_token(), refreshToken="R")
+            )
+
+        if path == "auth/token":
+            if json.loads(request.content)["refreshToken"] != "R":
+                return httpx.Response(401)
+            return httpx.Response(200, json=dict(accessToken=self._access_token()))
+
+        if request.headers.get("Authorization", "")[len("Bearer ") :] not in self.valid:
+            return httpx.Response(401)
+
+        return await super().__call__(request)
+
+
+@pytest.fixture()
+def auth_ipf():
+    return AuthIPFabric(devices=6, sites=2)
+
+
+@pytest.fixture()
+def make_source(auth_ipf, tmp_path):
+    def _make_source(**options):
+        return IPFabricSource(
+            base_url="https://ipf.mock",
+            username="user",
+            password="secret",
+            transport=auth_ipf.transport(),
+            SESSION_CACHE_FILE=str(tmp_path / "cache" / "session.json"),
+            **options,
+        )
+
+    return _make_source
+
+
+async def fetch_devices(source):
+    await source.login()
+    col = COLLECTIONS["devices"](source=source)
+    await col.fetch()
+    await source.logout()
+    return col.source_records
+
+
+@pytest.mark.asyncio
+async def test_session_cache_restore(make_source, auth_ipf, tmp_path):
+    assert len(await fetch_devices(make_source())) == auth_ipf.n_devices
+    assert auth_ipf.paths.count("auth/login") == 1
+
+    cache_file = tmp_path / "cache" / "session.json"
+    assert stat.S_IMODE(cache_file.stat().st_mode) == SessionCache.FILE_MODE
+
+    # the second source restores the login state, making only the table
+    # request.
+
+    auth_ipf.paths.clear()
+    source = make_source()
+    assert len(await fetch_devices(source)) == auth_ipf.n_devices
+    assert auth_ipf.paths == ["tables/inventory/devices"]
+    assert source.client.version == "mock"
+    assert source.client.active_snapshot == AuthIPFabric.SNAPSHOT_ID
+
+
+def test_client_pinned_version(make_source):
+    # the client initialization mirrors that of the aioipfabric versions
+    # pinned in requirements.txt.
+
+    requirement = next(
+        line.strip()
+        for line in open(Path(__file__).parents[1] / "requirements.txt")
+        if line.startswith("aio-ipfabric")
+    )
+    low, high = re.match(r"aio-ipfabric>=([\d.]+),<([\d.]+)", requirement).groups()
+    installed = version("aio-ipfabric")
+
+    def as_tuple(ver):
+        return tuple(int(part) for part in ver.split(".")[:2])
+
+    assert as_tuple(low) <= as_tuple(installed) < as_tuple(high)
+
+    # the login state is available before login, and is restored.
+
+    client = make_source().client
+    state = client.session_state()
+    assert state["active_snapshot"] is None and state["authorization"] is None
+
+    snapshots = [dict(id="s1", name="first"), dict(id="s2", name="second")]
+    client.restore_session(
+        dict(
+            version="mock",
+            snapshots=snapshots,
+            active_snapshot="s2",
+            authorization="Bearer a",
+            refresh_token="r",
+        )
+    )
+    assert client.active_snapshot == "s2"
+    assert client.session_state()["refresh_token"] == "r"
+
+
+@pytest.mark.asyncio
+async def test_session_refresh_on_401(make_source, auth_ipf):
+    await fetch_devices(make_source())
+    auth_ipf.expire()
+    auth_ipf.paths.clear()
+
+    assert len(await fetch_devices(make_source())) == auth_ipf.n_devices
+    assert auth_ipf.paths == [
+        "tables/inventory/devices",
+        "auth/token",
+        "tables/inventory/devices",
+    ]
+
+    # the refreshed access token is stored into the session cache.
+
+    auth_ipf.paths.clear()
+    await fetch_devices(make_source())
+    assert auth_ipf.paths == ["tables/inventory/devices"]
+
+
+@pytest.mark.asyncio
+async def test_session_relogin_on_invalid_refresh(make_source, auth_ipf, tmp_path):
+    await fetch_devices(make_source())
+
+    cache = SessionCache(path=tmp_path / "cache" / "session.json", ttl=60)
+    key = next(iter(json.loads(cache.path.read_text())))
+    cache.put(key, dict(cache.get(key), authorization="Bearer x", refresh_token="y"))
+
+    auth_ipf.paths.clear()
+    assert len(await fetch_devices(make_source())) == auth_ipf.n_devices
+    assert auth_ipf.paths == [
+        "tables/inventory/devices",
+        "auth/token",
+        "auth/login",
+        "tables/inventory/devices",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_session_concurrent_refresh(make_source, auth_ipf):
+    source = make_source()
+    await source.login()
+    auth_ipf.expire()
+
+    await asyncio.gather(
+        *(COLLECTIONS[name](source=source).fetch() for name in ("devices", "sites"))
+    )
+    assert auth_ipf.paths.count("auth/token") == 1
+
+    await source.logout()
+
+
+def test_session_cache_expiry(tmp_path, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(session_cache.time, "time", lambda: now)
+
+    cache = SessionCache(path=tmp_path / "session.json", ttl=60)
+    key = SessionCache.entry_key("https://ipf", "user")
+    assert key != SessionCache.entry_key("https://ipf", "other")
+
+    cache.put(key, dict(version="mock"))
+    assert cache.get(key) == dict(version="mock")
+
+    # a put that does not renew keeps the expiry of the entry.
+
+    now += 50
+    cache.put(key, dict(version="new"), renew=False)
+    now += 20
+    assert cache.get(key) is None
+
+    cache.put(key, dict(version="new"))
+    now += 50
+    assert cache.get(key) == dict(version="new")
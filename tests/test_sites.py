@@ -0,0 +1,53 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from conftest import COLLECTIONS
+
+SITES_TABLE = "/tables/inventory/sites"
+
+
+@pytest.mark.asyncio
+async def test_fetch_filter_in_request(source, mock_ipf):
+    col = COLLECTIONS["sites"](source=source)
+    await col.fetch(filters="siteName = site0001")
+
+    # the filter is applied by the IPF system, not to the fetched records.
+
+    assert mock_ipf.bodies == [
+        (
+            SITES_TABLE,
+            {
+                "snapshot": mock_ipf.SNAPSHOT_ID,
+                "filters": {"siteName": ["eq", "site0001"]},
+                "columns": ["siteName"],
+            },
+        )
+    ]
+    assert col.source_records == [{"siteName": "site0001"}]
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_filter_in_request(source, mock_ipf):
+    col = COLLECTIONS["sites"](source=source)
+    await col.fetch_items({"site0002": None, "site0003": None})
+
+    ((path, body),) = mock_ipf.bodies
+    assert path == SITES_TABLE
+    assert body["filters"] == {
+        "or": [{"siteName": ["eq", "site0002"]}, {"siteName": ["eq", "site0003"]}]
+    }
+    assert set(col.items) == {"site0002", "site0003"}
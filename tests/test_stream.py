@@ -0,0 +1,84 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from conftest import COLLECTIONS
+
+
+def page_requests(mock_ipf):
+    return [
+        (body["pagination"]["start"], body["pagination"]["limit"])
+        for path, body in mock_ipf.bodies
+        if path == "/tables/inventory/devices"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fetch_pages(source, mock_ipf):
+    col = COLLECTIONS["devices"](source=source)
+    pages = [page async for page in col.fetch_pages(page_size=7)]
+
+    # the last page is short, so no further page is requested.
+
+    assert list(map(len, pages)) == [7, 7, 6]
+    assert page_requests(mock_ipf) == [(0, 7), (7, 7), (14, 7)]
+    assert not col.source_records
+
+    expected = COLLECTIONS["devices"](source=source)
+    await expected.fetch()
+    assert [rec for page in pages for rec in page] == expected.source_records
+
+
+@pytest.mark.asyncio
+async def test_fetch_pages_exact_multiple(source, mock_ipf):
+    col = COLLECTIONS["devices"](source=source)
+    pages = [page async for page in col.fetch_pages(page_size=10)]
+
+    # the last page is full, so the empty page that follows is requested,
+    # but not yielded.
+
+    assert list(map(len, pages)) == [10, 10]
+    assert page_requests(mock_ipf) == [(0, 10), (10, 10), (20, 10)]
+
+
+@pytest.mark.asyncio
+async def test_fetch_stream(source, mock_ipf):
+    col = COLLECTIONS["devices"](source=source)
+    streamed = [items async for items in col.fetch_stream(page_size=7)]
+
+    assert list(map(len, streamed)) == [7, 7, 6]
+
+    expected = COLLECTIONS["devices"](source=source)
+    await expected.fetch()
+    assert [item for items in streamed for item in items] == list(
+        map(expected.itemize, expected.source_records)
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetch_stream_stopped(source, mock_ipf):
+    col = COLLECTIONS["devices"](source=source)
+    stream = col.fetch_stream(page_size=7)
+
+    async for items in stream:
+        assert len(items) == 7
+        break
+
+    await stream.aclose()
+
+    # no page is requested after the consumer stops.
+
+    assert page_requests(mock_ipf) == [(0, 7)]
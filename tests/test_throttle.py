@@ -0,0 +1,110 @@
+#      Copyright (C) 2020  Jeremy Schulman
+#
+#      This program is free software: you can redistribute it and/or modify
+#      it under the terms of the GNU General Public License as published by
+#      the Free Software Foundation, either version 3 of the License, or
+#      (at your option) any later version.
+#
+#      This program is distributed in the hope that it will be useful,
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#      GNU General Public License for more details.
+#
+#      You should have received a copy of the GNU General Public License
+#      along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from nauti_ipfabric.throttle import AdaptiveLimiter, retry_after, backoff_delay
+
+
+@pytest.mark.asyncio
+async def test_limiter_healthy_traffic_does_not_shrink():
+    """ requests of varying latency, e.g. page sizes, never reduce the limit """
+    limiter = AdaptiveLimiter(initial=10, maximum=20)
+    rand = random.Random(0)
+
+    async def request():
+        async with limiter.slot():
+            await asyncio.sleep(rand.choice([0.0, 0.001, 0.02]))
+
+    await asyncio.gather(*(request() for _ in range(200)))
+
+    assert limiter.limit > 10
+    assert limiter.limit <= 20
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_failure_halves_limit():
+    limiter = AdaptiveLimiter(initial=8, maximum=20, minimum=2)
+
+    async with limiter.slot() as slot:
+        slot.failed = True
+
+    assert limiter.limit == 4
+
+    for _ in range(5):
+        async with limiter.slot() as slot:
+            slot.failed = True
+
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_limiter_transport_error_is_failure():
+    limiter = AdaptiveLimiter(initial=8, maximum=20)
+
+    with pytest.raises(httpx.ConnectError):
+        async with limiter.slot():
+            raise httpx.ConnectError("refused")
+
+    assert limiter.limit == 4
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_other_error_is_not_failure():
+    limiter = AdaptiveLimiter(initial=8, maximum=8)
+
+    with pytest.raises(KeyError):
+        async with limiter.slot():
+            raise KeyError("data")
+
+    assert limiter.limit == 8
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_bounds_concurrency():
+    limiter = AdaptiveLimiter(initial=3, maximum=3)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.active)
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(request() for _ in range(20)))
+    assert peak == 3
+
+
+def test_retry_after():
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "2"})) == 2.0
+    assert retry_after(httpx.Response(429)) is None
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "soon"})) is None
+
+    past = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert retry_after(httpx.Response(503, headers={"Retry-After": past})) == 0.0
+
+
+def test_backoff_delay_bounds():
+    for attempt in range(1, 10):
+        assert (
+            0 <= backoff_delay(attempt, 0.5, 4.0) <= min(4.0, 0.5 * 2 ** (attempt - 1))
+        )